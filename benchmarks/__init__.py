@@ -0,0 +1 @@
+# Benchmarks de la API (se ejecutan con python -m benchmarks.<script> desde la raíz)
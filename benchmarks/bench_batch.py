@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark de GET /customers/batch frente a N GET /customers/{id} secuenciales.
+
+Para cada N mide el tiempo total de resolver N customers existentes con una
+sola petición batch (WHERE customer_id = ANY(:ids)) y con N peticiones
+individuales, en proceso con TestClient (incluye conexión, SQL y
+serialización). El cache de respuestas se desactiva para que cada GET consulte
+Postgres.
+
+Con DB_POOL_MODE=null cada petición abre su propia conexión, como en Vercel.
+
+Uso (con DATABASE_URL apuntando a la base de datos de pruebas):
+    DB_POOL_MODE=null python -m benchmarks.bench_batch --sizes 10 50 100
+"""
+import argparse
+import random
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from database import SessionLocal
+from main import app
+from customer import models
+from customer.http_cache import response_cache
+from benchmarks.load_db_modes import percentile
+
+
+def existing_ids(db, limit=10000):
+    return db.execute(select(models.Customer.customer_id).limit(limit)).scalars().all()
+
+
+def timed(call):
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000
+
+
+def sequential(client, ids):
+    for customer_id in ids:
+        client.get(f"/customers/{customer_id}").raise_for_status()
+
+
+def batched(client, ids):
+    response = client.get("/customers/batch", params={"ids": ",".join(map(str, ids))})
+    response.raise_for_status()
+    if len(response.json()["customers"]) != len(ids):
+        raise RuntimeError("El batch no devolvió todos los customers pedidos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100], help="ids por petición")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        customer_ids = existing_ids(db)
+    finally:
+        db.close()
+    if len(customer_ids) < max(args.sizes):
+        print("No hay suficientes customers: sembrar antes (ver benchmarks.bench_pagination --seed)")
+        return 1
+
+    response_cache.max_size = 0
+    client = TestClient(app)
+    print(f"{'N':>5} {'modo':<12} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for size in args.sizes:
+        samples = {"secuencial": [], "batch": []}
+        for _ in range(args.repeat):
+            ids = random.sample(customer_ids, size)
+            samples["secuencial"].append(timed(lambda: sequential(client, ids)))
+            samples["batch"].append(timed(lambda: batched(client, ids)))
+        for mode, values in samples.items():
+            print(f"{size:>5} {mode:<12} {percentile(values, 50):>9.2f} {percentile(values, 95):>9.2f}")
+        speedup = percentile(samples["secuencial"], 50) / percentile(samples["batch"], 50)
+        print(f"{'':>5} {'mejora p50':<12} {speedup:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark de cold start de `main:app`.
+
+Ejecuta procesos nuevos de Python y mide:
+  * el tiempo de import de `main` según `python -X importtime` (y los módulos más caros)
+  * el tiempo hasta la primera respuesta (proceso nuevo -> import -> primer GET)
+
+Uso:
+    python -m benchmarks.bench_cold_start --runs 10 --path / --output cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+FIRST_RESPONSE_SCRIPT = """
+import time
+start = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+response = TestClient(app).get({path!r})
+done = time.perf_counter()
+print(f"{{(imported - start) * 1000:.3f}} {{(done - start) * 1000:.3f}} {{response.status_code}}")
+"""
+
+
+def import_times():
+    """Tiempos acumulados (µs) por módulo de un `import main` en un proceso nuevo"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def first_response(path):
+    """(ms de import, ms hasta la primera respuesta, status) en un proceso nuevo"""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE_SCRIPT.format(path=path)],
+        capture_output=True, text=True, check=True,
+    )
+    import_ms, response_ms, status_code = result.stdout.split()[-3:]
+    return float(import_ms), float(response_ms), int(status_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/", help="endpoint para la primera petición")
+    parser.add_argument("--top", type=int, default=15, help="módulos más caros a mostrar")
+    parser.add_argument("--output", help="archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    samples = [import_times() for _ in range(args.runs)]
+    main_us = statistics.median(sample.get("main", 0) for sample in samples)
+    last = samples[-1]
+    heaviest = sorted(last.items(), key=lambda item: item[1], reverse=True)[: args.top]
+
+    responses = [first_response(args.path) for _ in range(args.runs)]
+    import_ms = statistics.median(r[0] for r in responses)
+    response_ms = statistics.median(r[1] for r in responses)
+
+    print(f"import main (importtime, mediana):   {main_us / 1000:.1f} ms")
+    print(f"import main (reloj, mediana):        {import_ms:.1f} ms")
+    print(f"primera respuesta GET {args.path} (mediana): {response_ms:.1f} ms (status {responses[-1][2]})")
+    print("\nmódulos más caros (acumulado):")
+    for name, cumulative in heaviest:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+    for name in ("passlib", "jose", "psycopg2", "asyncpg"):
+        if name in last:
+            print(f"  aviso: {name} se importa en el cold start")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "runs": args.runs,
+                "path": args.path,
+                "import_main_ms": main_us / 1000,
+                "import_wall_ms": import_ms,
+                "first_response_ms": response_ms,
+                "modules_ms": {name: cumulative / 1000 for name, cumulative in heaviest},
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Benchmark y prueba de carga de todos los endpoints de user/main.py y customer/main.py.
+
+Arranca un Postgres local desechable (benchmarks/local_postgres.py) con los
+schemas login y sales, inserta usuarios y customers sintéticos, levanta
+`main:app` con uvicorn y lanza por cada ruta un número fijo de peticiones con la
+concurrencia indicada. Los resultados (p50/p95/p99, throughput y errores por
+escenario) se escriben en un JSON; con --baseline se comparan contra una
+ejecución anterior y el proceso sale con código 1 si algún escenario empeora más
+que --tolerance.
+
+Uso (como usuario sin privilegios, con los binarios de Postgres en PG_BIN o PATH):
+    python -m benchmarks.bench_endpoints --output benchmarks/baseline.json
+    python -m benchmarks.bench_endpoints --baseline benchmarks/baseline.json --tolerance 0.2
+
+Con --database-url se usa una base de datos existente en lugar de arrancar una.
+GET /customers/search necesita la extensión pg_trgm en el servidor de Postgres.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+import httpx
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_pagination import seed_customers
+from benchmarks.load_db_modes import percentile, start_server
+
+PASSWORD = "benchpass"
+BULK_SIZE = 10
+
+
+class Fixtures:
+    """Datos sembrados que usan los escenarios para construir sus peticiones"""
+
+    def __init__(self, run_id, customer_range, deletable_customers, users, deletable_users):
+        self.run_id = run_id
+        self.customer_range = customer_range
+        self.deletable_customers = deque(deletable_customers)
+        self.users = users  # [(id, username, token)]
+        self.deletable_users = deque(deletable_users)
+        self.counter = itertools.count()
+
+    def customer_id(self):
+        return random.randint(*self.customer_range)
+
+    def user(self):
+        return random.choice(self.users)
+
+    def auth(self, user=None):
+        return {"Authorization": f"Bearer {(user or self.user())[2]}"}
+
+    def unique(self, prefix):
+        return f"{prefix}_{self.run_id}_{next(self.counter)}"
+
+
+class Scenario:
+    """
+    Un endpoint a medir. `build(fixtures)` devuelve (método, ruta, kwargs de httpx)
+    y `weight` escala el número de peticiones (rutas con bcrypt o muy pesadas).
+    """
+
+    def __init__(self, name, build, weight=1.0, consumes_customers=0, consumes_users=0):
+        self.name = name
+        self.build = build
+        self.weight = weight
+        self.consumes_customers = consumes_customers
+        self.consumes_users = consumes_users
+
+
+def import_body(f):
+    rows = "\n".join(f"Import{next(f.counter)},Apellido,+100000000,Calle {n}" for n in range(10))
+    return {"content": "first_name,last_name,phone,address\n" + rows + "\n", "headers": {"Content-Type": "text/csv"}}
+
+
+SCENARIOS = [
+    # user/main.py
+    Scenario("auth_test", lambda f: ("GET", "/auth/test", {})),
+    Scenario("auth_register", lambda f: ("POST", "/auth/register", {"json": {
+        "username": f.unique("reg"), "email": f"{f.unique('reg')}@bench.local", "password": PASSWORD,
+    }}), weight=0.2),
+    Scenario("auth_login", lambda f: ("POST", "/auth/login", {"json": {
+        "username": f.user()[1], "password": PASSWORD,
+    }}), weight=0.2),
+    Scenario("auth_me", lambda f: ("GET", "/auth/me", {"headers": f.auth()})),
+    Scenario("auth_update_me", lambda f: ("PUT", "/auth/me", {
+        "headers": f.auth(), "json": {"email": f"{f.unique('mail')}@bench.local"},
+    })),
+    # change_password revoca el token (token_version): usa un usuario descartable
+    Scenario("auth_change_password", lambda f: ("POST", "/auth/change-password", {
+        "headers": f.auth(f.deletable_users.popleft()),
+        "json": {"current_password": PASSWORD, "new_password": PASSWORD},
+    }), weight=0.2, consumes_users=1),
+    Scenario("auth_delete_me", lambda f: ("DELETE", "/auth/me", {
+        "headers": f.auth(f.deletable_users.popleft()),
+    }), weight=0.2, consumes_users=1),
+    Scenario("auth_list_users", lambda f: ("GET", "/auth/users?limit=100", {"headers": f.auth()})),
+    Scenario("auth_list_users_cursor", lambda f: ("GET", "/auth/users?limit=100&cursor=", {"headers": f.auth()})),
+    Scenario("auth_get_user", lambda f: ("GET", f"/auth/users/{f.user()[0]}", {"headers": f.auth()})),
+    Scenario("auth_delete_user", lambda f: ("DELETE", f"/auth/users/{f.deletable_users.popleft()[0]}", {
+        "headers": f.auth(),
+    }), weight=0.2, consumes_users=1),
+    # customer/main.py
+    Scenario("customers_test", lambda f: ("GET", "/customers/test", {})),
+    Scenario("customers_config", lambda f: ("GET", "/customers/config", {})),
+    Scenario("customers_debug", lambda f: ("GET", "/customers/debug", {})),
+    Scenario("customers_create", lambda f: ("POST", "/customers/", {"json": {
+        "first_name": f.unique("Bench"), "last_name": "Apellido", "phone": "+100000000", "address": "Calle 1",
+    }})),
+    Scenario("customers_list", lambda f: ("GET", "/customers/?limit=100", {})),
+    Scenario("customers_list_cursor", lambda f: ("GET", "/customers/?limit=100&cursor=&sort=-created_at", {})),
+    Scenario("customers_list_filtered", lambda f: (
+        "GET", "/customers/?limit=100&last_name_prefix=Apellido12&has_phone=true&sort=last_name", {},
+    )),
+    Scenario("customers_search", lambda f: ("GET", f"/customers/search?q=Nombre{f.customer_id() % 1000}", {})),
+    Scenario("customers_export", lambda f: ("GET", "/customers/export?format=ndjson", {}), weight=0.05),
+    Scenario("customers_import", lambda f: ("POST", "/customers/import?format=csv", import_body(f)), weight=0.2),
+    Scenario("customers_bulk_create", lambda f: ("POST", "/customers/bulk", {"json": [
+        {"first_name": f.unique("Bulk"), "last_name": "Apellido"} for _ in range(BULK_SIZE)
+    ]}), weight=0.2),
+    Scenario("customers_bulk_update", lambda f: ("PATCH", "/customers/bulk", {"json": [
+        {"customer_id": customer_id, "phone": "+199999999"}
+        for customer_id in random.sample(range(f.customer_range[0], f.customer_range[1] + 1), BULK_SIZE)
+    ]}), weight=0.2),
+    Scenario("customers_bulk_delete", lambda f: ("DELETE", "/customers/bulk", {"json": [
+        f.deletable_customers.popleft() for _ in range(BULK_SIZE)
+    ]}), weight=0.2, consumes_customers=BULK_SIZE),
+    Scenario("customers_batch", lambda f: (
+        "GET", "/customers/batch?ids=" + ",".join(str(f.customer_id()) for _ in range(BULK_SIZE)), {},
+    )),
+    Scenario("customers_get", lambda f: ("GET", f"/customers/{f.customer_id()}", {})),
+    Scenario("customers_update", lambda f: ("PUT", f"/customers/{f.customer_id()}", {
+        "json": {"address": f.unique("Calle")},
+    })),
+    Scenario("customers_delete", lambda f: ("DELETE", f"/customers/{f.deletable_customers.popleft()}", {}),
+             consumes_customers=1),
+]
+
+
+def scenario_requests(scenario, requests):
+    return max(1, int(requests * scenario.weight))
+
+
+def seed(url, scenarios, requests, customers, users):
+    """Insertar los datos de prueba y devolver los Fixtures"""
+    from user.auth import create_access_token, get_password_hash, token_claims
+
+    run_id = int(time.time())
+    deletable_customers = sum(scenario.consumes_customers * scenario_requests(scenario, requests)
+                              for scenario in scenarios)
+    deletable_users = sum(scenario.consumes_users * scenario_requests(scenario, requests)
+                          for scenario in scenarios)
+    password_hash = get_password_hash(PASSWORD)
+
+    engine = create_engine(url)
+    with Session(engine) as db:
+        seed_customers(db, customers)
+        customer_range = db.execute(text("SELECT min(customer_id), max(customer_id) FROM sales.customer")).one()
+        extra_customers = db.execute(text("""
+            INSERT INTO sales.customer (first_name, last_name)
+            SELECT 'Borrar' || g, 'Apellido' FROM generate_series(1, :count) AS g
+            RETURNING customer_id
+        """), {"count": deletable_customers}).scalars().all()
+        created_users = db.execute(text("""
+            INSERT INTO login."user" (username, email, password_hash)
+            SELECT 'bench_' || :run || '_' || g, 'bench_' || :run || '_' || g || '@bench.local', :hash
+            FROM generate_series(1, :count) AS g
+            RETURNING id, username, email, token_version
+        """), {"run": run_id, "hash": password_hash, "count": users + deletable_users}).all()
+        db.execute(text("ANALYZE"))
+        db.commit()
+    engine.dispose()
+
+    with_tokens = [(user.id, user.username, create_access_token(token_claims(user))) for user in created_users]
+    return Fixtures(run_id, tuple(customer_range), extra_customers, with_tokens[:users], with_tokens[users:])
+
+
+async def run_scenario(client, scenario, fixtures, total, concurrency):
+    """Lanzar `total` peticiones del escenario con `concurrency` workers"""
+    latencies = []
+    errors = 0
+    pending = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            method, path, kwargs = scenario.build(fixtures)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code >= 400:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+async def run_all(base_url, scenarios, fixtures, requests, concurrency):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {}
+    for scenario in scenarios:
+        total = scenario_requests(scenario, requests)
+        # Un cliente por escenario: las conexiones cerradas por errores no afectan al siguiente
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            results[scenario.name] = await run_scenario(client, scenario, fixtures, total, concurrency)
+        r = results[scenario.name]
+        print(f"{scenario.name:<26} {total:>6} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>8}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regresiones respecto a la línea base: p95 y throughput fuera de tolerancia o más errores"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['rps']:.1f} -> {current['rps']:.1f} req/s")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errores {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def run(args, database_url):
+    scenarios = [s for s in SCENARIOS if not args.only or s.name in args.only]
+    print(f"Insertando {args.customers} customers y {args.users} usuarios...")
+    fixtures = seed(database_url, scenarios, args.requests, args.customers, args.users)
+
+    os.environ.update(DATABASE_URL=database_url, DB_SSLMODE=args.sslmode)
+    # Todas las peticiones salen de 127.0.0.1: el control de admisión rechazaría register/login
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    process = start_server(args.mode, args.port)
+    try:
+        print(f"{'escenario':<26} {'pet.':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+        scenario_results = asyncio.run(
+            run_all(f"http://127.0.0.1:{args.port}", scenarios, fixtures, args.requests, args.concurrency)
+        )
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "customers": args.customers,
+        "users": args.users,
+        "scenarios": scenario_results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="usar esta base de datos en lugar de arrancar un Postgres local")
+    parser.add_argument("--sslmode", default="disable", help="DB_SSLMODE para la API")
+    parser.add_argument("--pg-port", type=int, default=55432)
+    parser.add_argument("--port", type=int, default=8766, help="puerto de uvicorn")
+    parser.add_argument("--mode", default="sync", choices=["sync", "async"])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="peticiones por escenario (antes de weight)")
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--only", nargs="+", choices=[s.name for s in SCENARIOS], help="escenarios a ejecutar")
+    parser.add_argument("--output", default="benchmarks/results.json")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="empeoramiento relativo permitido")
+    args = parser.parse_args()
+
+    if args.database_url:
+        results = run(args, args.database_url)
+    else:
+        from benchmarks.local_postgres import LocalPostgres
+
+        with LocalPostgres(port=args.pg_port) as pg:
+            results = run(args, pg.url)
+
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"\nResultados en {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESIÓN {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
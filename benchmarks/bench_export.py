@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la exportación en streaming de customers (NDJSON / CSV).
+
+Consume el mismo generador que usa GET /customers/export y reporta el pico de
+memoria (tracemalloc y RSS) y el throughput. El pico debe ser el mismo con
+100.000 que con 1.000.000 de filas.
+
+Uso (con DATABASE_URL apuntando a la base de datos de pruebas):
+    python -m benchmarks.bench_export --seed 1000000 --format ndjson
+"""
+import argparse
+import resource
+import sys
+import time
+import tracemalloc
+
+from customer import export
+from database import SessionLocal
+from benchmarks.bench_pagination import seed_customers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="customers sintéticos a insertar antes de medir")
+    parser.add_argument("--format", default="ndjson", choices=sorted(export.EXPORTERS))
+    parser.add_argument("--batch-size", type=int, default=export.EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.seed:
+        db = SessionLocal()
+        try:
+            print(f"Insertando {args.seed} customers...")
+            seed_customers(db, args.seed)
+        finally:
+            db.close()
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    total_bytes = 0
+    lines = 0
+    for chunk in export.EXPORTERS[args.format](args.batch_size):
+        total_bytes += len(chunk)
+        lines += chunk.count(b"\n")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    rows = lines - (1 if args.format == "csv" else 0)
+    print(f"formato:            {args.format}")
+    print(f"filas:              {rows} ({rows / elapsed:.0f} filas/s)")
+    print(f"bytes:              {total_bytes / 1e6:.1f} MB")
+    print(f"tiempo:             {elapsed:.2f} s ({total_bytes / 1e6 / elapsed:.1f} MB/s)")
+    print(f"pico tracemalloc:   {peak / 1e6:.1f} MB")
+    print(f"crecimiento RSS:    {(rss_after - rss_before) / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
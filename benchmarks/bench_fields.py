@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark de sparse fieldsets (?fields=) sobre filas anchas.
+
+Inserta customers con una dirección larga y compara, para GET /customers/ y
+GET /customers/{id}, la respuesta completa contra
+fields=customer_id,first_name,last_name: tamaño del payload y latencia
+p50/p95 medida en proceso con TestClient (incluye SQL y serialización).
+
+Uso (con DATABASE_URL apuntando a la base de datos de pruebas):
+    python -m benchmarks.bench_fields --seed 10000 --address-size 2000
+"""
+import argparse
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from database import SessionLocal
+from main import app
+from benchmarks.load_db_modes import percentile
+
+FIELDS = "customer_id,first_name,last_name"
+
+
+def seed_wide_customers(db, count, address_size):
+    """Customers sintéticos con `address` de `address_size` caracteres"""
+    result = db.execute(text("""
+        INSERT INTO sales.customer (first_name, last_name, phone, address)
+        SELECT 'Nombre' || g, 'Apellido' || (g % 5000), '+1' || lpad(g::text, 10, '0'),
+               repeat('Calle Principal ', :size / 16 + 1)
+        FROM generate_series(1, :count) AS g
+        RETURNING customer_id
+    """), {"count": count, "size": address_size})
+    first_id = min(row[0] for row in result)
+    db.commit()
+    return first_id
+
+
+def measure(client, url, repeat):
+    """(bytes del payload, p50 ms, p95 ms)"""
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        size = len(response.content)
+    return size, percentile(samples, 50), percentile(samples, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1000, help="customers anchos a insertar antes de medir")
+    parser.add_argument("--address-size", type=int, default=2000, help="caracteres de address por fila")
+    parser.add_argument("--limit", type=int, default=100, help="tamaño de página del listado")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Insertando {args.seed} customers con address de {args.address_size} caracteres...")
+        first_id = seed_wide_customers(db, args.seed, args.address_size)
+    finally:
+        db.close()
+
+    # Listado posicionado sobre las filas anchas recién insertadas
+    list_url = f"/customers/?limit={args.limit}&sort=-customer_id"
+    cases = [
+        ("listado", list_url),
+        ("por id", f"/customers/{first_id}"),
+    ]
+
+    client = TestClient(app)
+    print(f"{'endpoint':<10} {'respuesta':<10} {'bytes':>10} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for label, url in cases:
+        separator = "&" if "?" in url else "?"
+        full = measure(client, url, args.repeat)
+        sparse = measure(client, f"{url}{separator}fields={FIELDS}", args.repeat)
+        for name, (size, p50, p95) in (("completa", full), ("fields", sparse)):
+            print(f"{label:<10} {name:<10} {size:>10} {p50:>9.2f} {p95:>9.2f}")
+        print(f"{'':<10} {'reducción':<10} {1 - sparse[0] / full[0]:>10.0%} "
+              f"{1 - sparse[1] / full[1]:>9.0%} {1 - sparse[2] / full[2]:>9.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
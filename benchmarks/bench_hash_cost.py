@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark del costo de bcrypt: logins por segundo por núcleo para cada BCRYPT_ROUNDS.
+
+Para cada costo mide la verificación de una contraseña (lo que hace el login)
+en un thread, que equivale a un núcleo, y con --threads threads en paralelo
+(bcrypt libera el GIL, así que escala con los núcleos). Marca los costos cuyo p95
+cumple --target-ms y el que elegiría user.hash_cost.calibrate.
+
+Uso:
+    python -m benchmarks.bench_hash_cost --rounds 10 11 12 13 --target-ms 250
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from user.hash_cost import BCRYPT_TARGET_MS, calibrate
+from benchmarks.load_db_modes import percentile
+
+PASSWORD = "benchpass"
+
+
+def verify_times(hasher, stored, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        hasher.verify(PASSWORD, stored)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--target-ms", type=float, default=BCRYPT_TARGET_MS)
+    parser.add_argument("--repeat", type=int, default=10, help="verificaciones por thread y costo")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from passlib.hash import bcrypt
+
+    print(f"{'rounds':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'login/s/núcleo':>15} "
+          f"{f'login/s ({args.threads} thr)':>20} {'objetivo':>9}")
+    for rounds in args.rounds:
+        hasher = bcrypt.using(rounds=rounds)
+        stored = hasher.hash(PASSWORD)
+        single = verify_times(hasher, stored, args.repeat)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(lambda _: verify_times(hasher, stored, args.repeat), range(args.threads)))
+        parallel = args.threads * args.repeat / (time.perf_counter() - start)
+
+        p95 = percentile(single, 95)
+        meets = "sí" if p95 <= args.target_ms else "no"
+        print(f"{rounds:>6} {percentile(single, 50):>9.1f} {p95:>9.1f} {1000 / percentile(single, 50):>15.1f} "
+              f"{parallel:>20.1f} {meets:>9}")
+
+    rounds, elapsed = calibrate(args.target_ms)
+    print(f"\ncalibrate(target_ms={args.target_ms:.0f}): BCRYPT_ROUNDS={rounds} ({elapsed:.1f} ms por hash)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la búsqueda de usuario del login sobre login."user" con millones de filas.
+
+Compara la consulta anterior (username = :x OR email = :x, sensible a
+mayúsculas) con auth.login_condition (lower(email) o lower(username) según
+haya '@'): plan de EXPLAIN (índices usados) y p50/p95 de la consulta, para
+logins por username y por email. Al final mide POST /auth/login completo con
+TestClient, donde domina bcrypt.
+
+Los usuarios sintéticos comparten un mismo hash de contraseña (bench_<n>,
+bench_<n>@bench.local, contraseña "benchpass").
+
+Uso (con DATABASE_URL apuntando a la base de datos de pruebas, índices creados):
+    python -m benchmarks.bench_login --seed 2000000
+"""
+import argparse
+import random
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import or_, select, text
+
+from database import SessionLocal
+from main import app
+from user import auth, models
+from benchmarks.bench_search import explain, plan_indexes
+from benchmarks.load_db_modes import percentile
+
+PASSWORD = "benchpass"
+
+
+def seed_users(db, count):
+    """Usuarios bench_<n> con el mismo hash (un solo bcrypt)"""
+    start = db.execute(text('SELECT coalesce(max(id), 0) FROM login."user"')).scalar()
+    db.execute(text("""
+        INSERT INTO login."user" (username, email, password_hash)
+        SELECT 'bench_' || g, 'bench_' || g || '@bench.local', :hash
+        FROM generate_series(:start + 1, :start + :count) AS g
+        ON CONFLICT DO NOTHING
+    """), {"hash": auth.get_password_hash(PASSWORD), "start": start, "count": count})
+    db.execute(text('ANALYZE login."user"'))
+    db.commit()
+
+
+def or_condition(username):
+    """Condición anterior a auth.login_condition"""
+    return or_(models.User.username == username, models.User.email == username)
+
+
+def measure(db, statement, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.execute(statement).first()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50), percentile(samples, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="usuarios sintéticos a insertar antes de medir")
+    parser.add_argument("--repeat", type=int, default=500, help="consultas por caso")
+    parser.add_argument("--logins", type=int, default=20, help="POST /auth/login completos a medir")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.seed:
+            print(f"Insertando {args.seed} usuarios...")
+            seed_users(db, args.seed)
+        usernames = db.execute(
+            select(models.User.username).where(models.User.username.like("bench\\_%")).limit(1000)
+        ).scalars().all()
+        if not usernames:
+            print("No hay usuarios bench_<n>: usar --seed")
+            return 1
+        total = db.execute(text('SELECT count(*) FROM login."user"')).scalar()
+        print(f"{total} usuarios en login.\"user\"\n")
+
+        username = random.choice(usernames)
+        cases = {
+            "username": username,
+            "email": f"{username}@bench.local",
+            "email (mayúsculas)": f"{username.upper()}@BENCH.LOCAL",
+        }
+        print(f"{'login por':<20} {'consulta':<10} {'índices':<36} {'p50 (ms)':>9} {'p95 (ms)':>9} {'filas':>6}")
+        for label, value in cases.items():
+            for name, condition in (("OR", or_condition(value)), ("lower()", auth.login_condition(value))):
+                statement = select(models.User).where(condition)
+                plan = explain(db, statement)["Plan"]
+                found = db.execute(statement).first() is not None
+                p50, p95 = measure(db, statement, args.repeat)
+                indexes = ", ".join(sorted(plan_indexes(plan))) or plan["Node Type"]
+                print(f"{label:<20} {name:<10} {indexes:<36} {p50:>9.3f} {p95:>9.3f} {int(found):>6}")
+    finally:
+        db.close()
+
+    client = TestClient(app)
+    samples = []
+    for _ in range(args.logins):
+        body = {"username": random.choice(usernames), "password": PASSWORD}
+        start = time.perf_counter()
+        client.post("/auth/login", json=body).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"\nPOST /auth/login: p50 {percentile(samples, 50):.1f} ms, p95 {percentile(samples, 95):.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark de paginación: OFFSET vs cursor (keyset) sobre sales.customer.
+
+Mide la latencia de leer la página N con skip/limit y con cursor, para N desde 1
+hasta 10.000. Con cursor la latencia debe mantenerse plana.
+
+Uso (con DATABASE_URL apuntando a la base de datos de pruebas):
+    python -m benchmarks.bench_pagination --seed 1000000 --limit 100
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+import pagination
+from database import SessionLocal
+from customer import models
+from customer.main import SORT_COLUMNS
+
+PAGES = [1, 10, 100, 1000, 10000]
+
+
+def seed_customers(db, count):
+    """Insertar customers sintéticos con una sola sentencia"""
+    db.execute(text("""
+        INSERT INTO sales.customer (first_name, last_name, phone, address)
+        SELECT 'Nombre' || g, 'Apellido' || (g % 5000), '+1' || lpad(g::text, 10, '0'),
+               g || ' Calle Principal'
+        FROM generate_series(1, :count) AS g
+    """), {"count": count})
+    db.commit()
+
+
+def timed(fn, repeat):
+    """Mediana en milisegundos de `repeat` ejecuciones"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def cursor_for_page(db, sort, page, limit):
+    """Cursor que apunta al inicio de la página indicada (no se cronometra)"""
+    if page == 1:
+        return ""
+    sort_column = SORT_COLUMNS[sort]
+    row = (
+        db.query(sort_column, models.Customer.customer_id)
+        .order_by(sort_column, models.Customer.customer_id)
+        .offset((page - 1) * limit - 1)
+        .limit(1)
+        .first()
+    )
+    if row is None:
+        return None
+    return pagination.encode_cursor(sort, row[0], row[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="customers sintéticos a insertar antes de medir")
+    parser.add_argument("--limit", type=int, default=100, help="tamaño de página")
+    parser.add_argument("--sort", default="customer_id", choices=sorted(SORT_COLUMNS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ratio", type=float, default=3.0,
+                        help="falla si cursor(página 10.000) / cursor(página 1) supera este valor")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.seed:
+            print(f"Insertando {args.seed} customers...")
+            seed_customers(db, args.seed)
+
+        sort_column = SORT_COLUMNS[args.sort]
+        print(f"{'página':>8} {'offset (ms)':>12} {'cursor (ms)':>12}")
+        results = {}
+        for page in PAGES:
+            cursor = cursor_for_page(db, args.sort, page, args.limit)
+            if cursor is None:
+                print(f"{page:>8} {'sin datos suficientes':>25}")
+                continue
+
+            def offset_page():
+                db.query(models.Customer).order_by(sort_column, models.Customer.customer_id) \
+                    .offset((page - 1) * args.limit).limit(args.limit).all()
+
+            def keyset_page():
+                pagination.apply_keyset(
+                    db.query(models.Customer), args.sort, sort_column,
+                    models.Customer.customer_id, cursor, args.limit,
+                ).all()
+
+            results[page] = (timed(offset_page, args.repeat), timed(keyset_page, args.repeat))
+            print(f"{page:>8} {results[page][0]:>12.2f} {results[page][1]:>12.2f}")
+    finally:
+        db.close()
+
+    first, last = PAGES[0], max(results) if results else None
+    if last is None or last == first:
+        return 0
+    ratio = results[last][1] / results[first][1]
+    print(f"\ncursor página {last} / página {first}: {ratio:.2f}x")
+    return 0 if ratio <= args.max_ratio else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Comparación con pytest-benchmark de la ruta de lectura ORM + pydantic + json
+contra la ruta sin ORM de fast_read (select() de Core + orjson), para páginas de
+100 y 1000 customers.
+
+La ruta "orm" reproduce lo que hacía list_customers antes: objetos del ORM,
+validación from_attributes contra List[schemas.Customer] y JSONResponse.
+
+Uso (con DATABASE_URL apuntando a la base de datos de pruebas con al menos 1000
+customers; ver benchmarks.bench_pagination --seed):
+    pytest benchmarks/bench_read_path.py
+"""
+from typing import List
+
+import pytest
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+import fast_read
+from database import SessionLocal
+from customer import fieldsets, models, schemas
+
+CUSTOMER_LIST = TypeAdapter(List[schemas.Customer])
+
+
+@pytest.fixture(scope="module")
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def orm_page(db, rows):
+    customers = db.query(models.Customer).order_by(models.Customer.customer_id).limit(rows).all()
+    # Igual que FastAPI con response_model: validar y volver a serializar en modo json
+    content = CUSTOMER_LIST.dump_python(CUSTOMER_LIST.validate_python(customers), mode="json")
+    db.expunge_all()
+    return JSONResponse(content).body
+
+
+def core_page(db, rows):
+    keys = fieldsets.ALL_FIELDS
+    statement = select(*fieldsets.columns_for(keys)).order_by(models.Customer.customer_id).limit(rows)
+    return fast_read.render(fast_read.row_dicts(db.execute(statement).all(), keys)).body
+
+
+@pytest.mark.parametrize("rows", [100, 1000])
+def test_orm_read_path(benchmark, db, rows):
+    benchmark.group = f"{rows} filas"
+    body = benchmark(orm_page, db, rows)
+    assert body.count(b'"customer_id"') == rows
+
+
+@pytest.mark.parametrize("rows", [100, 1000])
+def test_core_orjson_read_path(benchmark, db, rows):
+    benchmark.group = f"{rows} filas"
+    body = benchmark(core_page, db, rows)
+    assert body.count(b'"customer_id"') == rows
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark de GET /customers/search (full-text + trigramas).
+
+Ejecuta la misma consulta que el endpoint (customer.search.search_statement) con
+términos representativos: nombre completo, apellido, teléfono parcial y nombre
+con error de tipeo. Primero verifica con EXPLAIN que el plan use los índices
+customer_search_vector_idx / customer_search_trgm_idx (create_indexes.sql) y
+luego reporta p50/p95 por término. Falla si algún p95 supera --max-p95-ms.
+
+Uso (con DATABASE_URL apuntando a la base de datos de pruebas, índices creados):
+    python -m benchmarks.bench_search --seed 1000000 --max-p95-ms 10
+"""
+import argparse
+import json
+import sys
+import time
+
+from database import SessionLocal
+from customer import search
+from benchmarks.bench_pagination import seed_customers
+from benchmarks.load_db_modes import percentile
+
+SEARCH_INDEXES = {"customer_search_vector_idx", "customer_search_trgm_idx"}
+
+# Términos según los datos de seed_customers
+TERMS = {
+    "nombre": "Nombre123457",
+    "apellido": "Apellido4321",
+    "teléfono parcial": "0000765432",
+    "error de tipeo": "Nombr123457",
+}
+
+
+def plan_indexes(plan):
+    """Nombres de índices que aparecen en un plan de EXPLAIN (FORMAT JSON)"""
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= plan_indexes(child)
+    return names
+
+
+def explain(db, statement):
+    compiled = statement.compile(db.get_bind())
+    row = db.connection().exec_driver_sql(
+        "EXPLAIN (ANALYZE, FORMAT JSON) " + str(compiled), compiled.params
+    ).scalar()
+    if isinstance(row, str):
+        row = json.loads(row)
+    return row[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="customers sintéticos a insertar antes de medir")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200, help="ejecuciones por término")
+    parser.add_argument("--max-p95-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failed = False
+    try:
+        if args.seed:
+            print(f"Insertando {args.seed} customers...")
+            seed_customers(db, args.seed)
+            db.connection().exec_driver_sql("ANALYZE sales.customer")
+            db.commit()
+
+        print(f"{'término':<18} {'índices':<52} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+        for label, term in TERMS.items():
+            statement = search.search_statement(term, args.limit)
+            used = plan_indexes(explain(db, statement)["Plan"]) & SEARCH_INDEXES
+
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                db.execute(statement).all()
+                samples.append((time.perf_counter() - start) * 1000)
+            p50, p95 = percentile(samples, 50), percentile(samples, 95)
+
+            print(f"{label:<18} {', '.join(sorted(used)) or 'NINGUNO (seq scan)':<52} {p50:>9.2f} {p95:>9.2f}")
+            failed = failed or not used or p95 > args.max_p95_ms
+    finally:
+        db.close()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Comparación de carga entre DB_MODE=sync y DB_MODE=async.
+
+Levanta `main:app` con uvicorn una vez por modo (mismo DATABASE_URL) y lanza
+N conexiones concurrentes contra un endpoint durante un tiempo fijo, reportando
+throughput y percentiles de latencia.
+
+Uso:
+    python -m benchmarks.load_db_modes --concurrency 500 --duration 30 --path /customers/1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    """Percentil por rango más cercano"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def start_server(mode, port):
+    """Arrancar uvicorn con el modo indicado y esperar a que responda"""
+    env = dict(os.environ, DB_MODE=mode)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/test", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn ({mode}) no arrancó en el puerto {port}")
+
+
+async def run_load(url, concurrency, duration):
+    """Lanzar `concurrency` workers que repiten la petición hasta agotar `duration`"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 500:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos por modo")
+    parser.add_argument("--path", default="/customers/1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        process = start_server(mode, args.port)
+        try:
+            url = f"http://127.0.0.1:{args.port}{args.path}"
+            results[mode] = asyncio.run(run_load(url, args.concurrency, args.duration))
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{'modo':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for mode, r in results.items():
+        print(f"{mode:>6} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
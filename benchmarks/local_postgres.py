@@ -0,0 +1,106 @@
+"""
+Postgres local desechable (initdb + pg_ctl, sin Docker) para los benchmarks.
+
+Crea un cluster en un directorio temporal, lo arranca en un puerto local con
+autenticación trust, crea la base de datos y aplica el esquema de la API: los
+schemas login y sales con las tablas de los modelos (customer.models,
+user.models) y los índices de create_indexes.sql.
+
+Los binarios se buscan en PG_BIN, en el PATH o con pg_config --bindir. initdb no
+se puede ejecutar como root: usar un usuario sin privilegios.
+
+    with LocalPostgres(port=55432) as pg:
+        os.environ["DATABASE_URL"] = pg.url
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+ROOT = Path(__file__).resolve().parent.parent
+INDEXES_SQL = ROOT / "create_indexes.sql"
+
+
+def find_bin_dir() -> Path:
+    """Directorio con initdb, pg_ctl y psql"""
+    if os.getenv("PG_BIN"):
+        return Path(os.environ["PG_BIN"])
+    pg_ctl = shutil.which("pg_ctl")
+    if pg_ctl:
+        return Path(pg_ctl).parent
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        return Path(subprocess.check_output([pg_config, "--bindir"], text=True).strip())
+    raise RuntimeError("No se encontraron los binarios de PostgreSQL: definir PG_BIN")
+
+
+class LocalPostgres:
+    def __init__(self, port: int = 55432, database: str = "nextapi", bin_dir=None):
+        self.port = port
+        self.database = database
+        self.bin_dir = Path(bin_dir) if bin_dir else find_bin_dir()
+        self.base_dir = None
+
+    @property
+    def url(self) -> str:
+        return f"postgresql://postgres@127.0.0.1:{self.port}/{self.database}"
+
+    def _run(self, binary, *args):
+        subprocess.run([str(self.bin_dir / binary), *args], check=True, stdout=subprocess.DEVNULL)
+
+    def start(self):
+        self.base_dir = Path(tempfile.mkdtemp(prefix="nextapi-pg-"))
+        data_dir = self.base_dir / "data"
+        self._run("initdb", "-D", str(data_dir), "-U", "postgres", "--auth=trust",
+                  "--encoding=UTF8", "--locale=C")
+        options = f"-p {self.port} -k {self.base_dir} -c listen_addresses=127.0.0.1 -c fsync=off"
+        self._run("pg_ctl", "-D", str(data_dir), "-o", options, "-l", str(self.base_dir / "postgres.log"),
+                  "-w", "start")
+        try:
+            self.create_schema()
+        except Exception:
+            self.stop()
+            raise
+        return self
+
+    def create_schema(self):
+        admin = create_engine(f"postgresql://postgres@127.0.0.1:{self.port}/postgres",
+                              isolation_level="AUTOCOMMIT")
+        with admin.connect() as connection:
+            connection.execute(text(f'CREATE DATABASE "{self.database}"'))
+        admin.dispose()
+
+        # Las tablas salen de los modelos, que son los que usa la API
+        from database import Base
+        from customer import models as customer_models  # noqa: F401
+        from user import models as user_models  # noqa: F401
+
+        engine = create_engine(self.url)
+        with engine.begin() as connection:
+            connection.execute(text("CREATE SCHEMA IF NOT EXISTS sales"))
+            connection.execute(text("CREATE SCHEMA IF NOT EXISTS login"))
+            Base.metadata.create_all(connection)
+        engine.dispose()
+
+        # psql sigue ante errores: p. ej. pg_trgm puede no estar instalado localmente
+        subprocess.run(
+            [str(self.bin_dir / "psql"), "-q", "-h", "127.0.0.1", "-p", str(self.port), "-U", "postgres",
+             "-d", self.database, "-f", str(INDEXES_SQL)],
+            check=True,
+        )
+
+    def stop(self):
+        if self.base_dir is None:
+            return
+        self._run("pg_ctl", "-D", str(self.base_dir / "data"), "-m", "fast", "-w", "stop")
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+        self.base_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,61 @@
+-- Índices de soporte para las consultas de la API
+-- Ejecuta este script en el SQL Editor de Supabase después de crear las tablas
+
+-- Columnas nuevas en tablas existentes
+-- token_version: se incrementa al cambiar la contraseña y revoca los tokens anteriores
+ALTER TABLE login."user" ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
+
+-- Paginación por cursor (keyset): (columna_de_orden, id) como clave de búsqueda
+CREATE INDEX IF NOT EXISTS customer_created_at_id_idx
+    ON sales.customer (created_at, customer_id);
+CREATE INDEX IF NOT EXISTS customer_last_name_id_idx
+    ON sales.customer (last_name, customer_id);
+
+CREATE INDEX IF NOT EXISTS user_created_at_id_idx
+    ON login."user" (created_at, id);
+
+-- Login y unicidad sin distinguir mayúsculas: Foo@x.com y foo@x.com son la misma
+-- cuenta. Falla si ya hay duplicados que solo difieren en mayúsculas (resolverlos antes)
+CREATE UNIQUE INDEX IF NOT EXISTS user_username_lower_idx
+    ON login."user" (lower(username));
+CREATE UNIQUE INDEX IF NOT EXISTS user_email_lower_idx
+    ON login."user" (lower(email));
+-- Usuarios anteriores con '@' en el username: el login los busca por email, así
+-- que solo pueden entrar con su email. Para listarlos y renombrarlos:
+--   SELECT id, username, email FROM login."user" WHERE username LIKE '%@%';
+
+-- Búsqueda de customers (GET /customers/search): full-text + trigramas
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Texto y tsvector de búsqueda. Las funciones IMMUTABLE permiten que el índice y
+-- la consulta usen exactamente la misma expresión
+CREATE OR REPLACE FUNCTION sales.customer_search_text(
+    first_name VARCHAR, last_name VARCHAR, phone VARCHAR, address TEXT
+) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' '
+        || coalesce(phone, '') || ' ' || coalesce(address, '')
+$$;
+
+CREATE OR REPLACE FUNCTION sales.customer_search_vector(
+    first_name VARCHAR, last_name VARCHAR, phone VARCHAR, address TEXT
+) RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT to_tsvector('simple'::regconfig, sales.customer_search_text(first_name, last_name, phone, address))
+$$;
+
+CREATE INDEX IF NOT EXISTS customer_search_vector_idx
+    ON sales.customer USING gin (sales.customer_search_vector(first_name, last_name, phone, address));
+CREATE INDEX IF NOT EXISTS customer_search_trgm_idx
+    ON sales.customer USING gin (sales.customer_search_text(first_name, last_name, phone, address) gin_trgm_ops);
+
+-- Filtros de GET /customers (created_from/created_to usan customer_created_at_id_idx)
+-- Prefijo de apellido (LIKE 'abc%') con cualquier collation, ordenado por apellido
+CREATE INDEX IF NOT EXISTS customer_last_name_pattern_idx
+    ON sales.customer (last_name text_pattern_ops, customer_id);
+-- has_phone=true combinado con rango u orden por fecha de creación
+CREATE INDEX IF NOT EXISTS customer_with_phone_created_at_id_idx
+    ON sales.customer (created_at, customer_id) WHERE phone IS NOT NULL;
+-- has_phone=false: sin él se recorre todo customer_created_at_id_idx descartando las filas con teléfono
+CREATE INDEX IF NOT EXISTS customer_without_phone_created_at_id_idx
+    ON sales.customer (created_at, customer_id) WHERE phone IS NULL;
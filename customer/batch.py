@@ -0,0 +1,53 @@
+"""
+Lectura de varios customers por id en una sola consulta (GET /customers/batch).
+
+Los ids llegan separados por comas y se resuelven con
+`WHERE customer_id = ANY(:ids)`: un único parámetro de tipo array, de modo que
+la sentencia es la misma para cualquier cantidad de ids y usa el índice de la
+clave primaria. La respuesta conserva el orden de entrada y lista aparte los ids
+que no existen.
+"""
+import os
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+import pagination
+from . import models
+
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "100"))
+
+
+def parse_ids(ids: str):
+    """Ids pedidos como enteros, sin repetidos y en el orden de entrada"""
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids debe ser una lista de enteros separados por comas")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids no puede estar vacío")
+    # Fuera del rango de customer_id (int4) el parámetro array fallaría en Postgres
+    out_of_range = [value for value in parsed if not 1 <= value <= pagination.INT4_MAX]
+    if out_of_range:
+        raise HTTPException(status_code=400, detail=f"ids fuera de rango (1..{pagination.INT4_MAX}): {out_of_range[0]}")
+    parsed = list(dict.fromkeys(parsed))
+    if len(parsed) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BATCH_MAX_IDS} ids por petición")
+    return parsed
+
+
+def batch_statement(ids, columns):
+    """SELECT de `columns` para los customers con customer_id en `ids`"""
+    return select(*columns).where(
+        models.Customer.customer_id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+    )
+
+
+def in_input_order(ids, rows, keys) -> dict:
+    """Cuerpo de la respuesta: customers en el orden de `ids` y los ids no encontrados"""
+    by_id = {row._mapping["customer_id"]: row._mapping for row in rows}
+    return {
+        "customers": [{name: by_id[customer_id][name] for name in keys} for customer_id in ids if customer_id in by_id],
+        "missing": [customer_id for customer_id in ids if customer_id not in by_id],
+    }
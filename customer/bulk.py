@@ -0,0 +1,161 @@
+"""
+Operaciones masivas sobre sales.customer con SQL por conjuntos.
+
+Cada chunk de BULK_CHUNK_SIZE elementos se aplica con una sola sentencia
+multi-fila (INSERT ... VALUES, UPDATE ... FROM (VALUES ...), DELETE ... IN)
+y todos los chunks se confirman en una única transacción.
+
+Los elementos que exceden la longitud de una columna o dejan en NULL una columna
+NOT NULL se reportan con status "invalid" y no se envían a Postgres: un
+DataError o IntegrityError abortaría todo el lote.
+"""
+import os
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import Boolean, Integer, String, Text, case, column, delete, insert, update, values
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "50000"))
+
+# Columnas que se pueden modificar en PATCH /customers/bulk
+UPDATABLE_COLUMNS = {
+    "first_name": String,
+    "last_name": String,
+    "phone": String,
+    "address": Text,
+}
+
+
+# Longitud máxima por columna según el modelo (None = sin límite), como en importer
+MAX_LENGTHS = {
+    name: getattr(models.Customer.__table__.c[name].type, "length", None)
+    for name in UPDATABLE_COLUMNS
+}
+# Columnas NOT NULL: un null explícito (p. ej. en PATCH) es inválido
+REQUIRED_COLUMNS = [name for name in UPDATABLE_COLUMNS if not models.Customer.__table__.c[name].nullable]
+
+
+def column_error(data: dict):
+    """Mensaje del primer campo que no cabe en su columna (longitud o NOT NULL), o None"""
+    for name in REQUIRED_COLUMNS:
+        if name in data and data[name] is None:
+            return f"{name}: no puede ser null"
+    for name, max_length in MAX_LENGTHS.items():
+        value = data.get(name)
+        if max_length and value is not None and len(value) > max_length:
+            return f"{name}: máximo {max_length} caracteres"
+    return None
+
+
+def invalid_result(index: int, error: str, customer_id=None) -> schemas.BulkItemResult:
+    return schemas.BulkItemResult(index=index, customer_id=customer_id, status="invalid", error=error)
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def insert_customers(db: Session, customers: List[schemas.CustomerCreate], chunk_size: int):
+    """INSERT multi-fila por chunk; los ids vuelven en el orden de entrada"""
+    results = []
+    stmt = insert(models.Customer).returning(models.Customer.customer_id, sort_by_parameter_order=True)
+    for start, chunk in chunks(customers, chunk_size):
+        valid = []
+        for offset, customer in enumerate(chunk):
+            data = customer.dict()
+            error = column_error(data)
+            if error:
+                results.append(invalid_result(start + offset, error))
+            else:
+                valid.append((start + offset, data))
+        if not valid:
+            continue
+        ids = db.execute(
+            stmt,
+            [data for _, data in valid],
+            execution_options={"insertmanyvalues_page_size": chunk_size},
+        ).scalars().all()
+        for (index, _), customer_id in zip(valid, ids):
+            results.append(schemas.BulkItemResult(index=index, customer_id=customer_id, status="created"))
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+def update_customers(db: Session, customers: List[schemas.CustomerBulkUpdate], chunk_size: int):
+    """
+    UPDATE ... FROM (VALUES ...) por chunk.
+    Cada fila lleva un flag por columna para modificar solo los campos enviados.
+    """
+    table = models.Customer
+    names = list(UPDATABLE_COLUMNS)
+    value_columns = [column("customer_id", Integer)]
+    for name, type_ in UPDATABLE_COLUMNS.items():
+        value_columns += [column(name, type_), column(f"set_{name}", Boolean)]
+
+    results = []
+    now = datetime.now()
+    for start, chunk in chunks(customers, chunk_size):
+        rows = []
+        invalid = {}
+        for offset, customer in enumerate(chunk):
+            data = customer.dict(exclude_unset=True)
+            error = column_error(data)
+            if error:
+                invalid[offset] = error
+                continue
+            row = [customer.customer_id]
+            for name in names:
+                row += [data.get(name), name in data]
+            rows.append(tuple(row))
+
+        updated = set()
+        if rows:
+            data_values = values(*value_columns, name="v").data(rows)
+            stmt = (
+                update(table)
+                .where(table.customer_id == data_values.c.customer_id)
+                .values(
+                    update_at=now,
+                    **{
+                        name: case(
+                            (data_values.c[f"set_{name}"], data_values.c[name]),
+                            else_=getattr(table, name),
+                        )
+                        for name in names
+                    },
+                )
+                .returning(table.customer_id)
+            )
+            updated = set(db.execute(stmt).scalars().all())
+        for offset, customer in enumerate(chunk):
+            if offset in invalid:
+                results.append(invalid_result(start + offset, invalid[offset], customer.customer_id))
+                continue
+            status = "updated" if customer.customer_id in updated else "not_found"
+            results.append(schemas.BulkItemResult(index=start + offset, customer_id=customer.customer_id, status=status))
+    return results
+
+
+def delete_customers(db: Session, customer_ids: List[int], chunk_size: int):
+    """DELETE ... WHERE customer_id IN (...) RETURNING por chunk"""
+    results = []
+    for start, chunk in chunks(customer_ids, chunk_size):
+        deleted = set(db.execute(
+            delete(models.Customer)
+            .where(models.Customer.customer_id.in_(chunk))
+            .returning(models.Customer.customer_id)
+        ).scalars().all())
+        for offset, customer_id in enumerate(chunk):
+            status = "deleted" if customer_id in deleted else "not_found"
+            results.append(schemas.BulkItemResult(index=start + offset, customer_id=customer_id, status=status))
+    return results
+
+
+def summarize(results) -> schemas.BulkResult:
+    failed = sum(1 for result in results if result.status in ("not_found", "invalid"))
+    return schemas.BulkResult(succeeded=len(results) - failed, failed=failed, results=results)
@@ -1,13 +1,22 @@
 
 # Importar configuración unificada de base de datos optimizada para serverless
-from database import engine, SessionLocal, Base, get_db, test_connection
+import database as _database
+from database import SessionLocal, Base, get_db, get_async_db, get_read_db, get_read_async_db, test_connection
 
 # Re-exportar para mantener compatibilidad
-__all__ = ['engine', 'SessionLocal', 'Base', 'get_db', 'test_connection']
+__all__ = ['engine', 'SessionLocal', 'Base', 'get_db', 'get_async_db', 'get_read_db', 'get_read_async_db', 'test_connection']
+
+def __getattr__(name):
+    # El engine se crea en el primer uso (ver database.get_engine)
+    if name == "engine":
+        return _database.get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Comentarios sobre la nueva configuración:
 # - engine: Objeto que gestiona la conexión a la base de datos, optimizado para Vercel
 # - SessionLocal: Clase de sesión para interactuar con la base de datos
 # - Base: Clase base para los modelos de SQLAlchemy
 # - get_db: Función generadora optimizada para serverless
+# - get_async_db: Equivalente async de get_db (DB_MODE=async)
+# - get_read_db / get_read_async_db: Sesión de solo lectura (réplica si DATABASE_REPLICA_URL)
 # - test_connection: Función para verificar la conectividad
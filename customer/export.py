@@ -0,0 +1,83 @@
+"""
+Exportación de sales.customer en streaming (NDJSON / CSV).
+
+Las filas se leen con un cursor del lado del servidor en lotes de
+EXPORT_BATCH_SIZE y se serializan lote a lote, de modo que la memoria usada no
+depende del tamaño de la tabla.
+"""
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import select
+
+import database
+from . import models
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+# Mismas claves que schemas.Customer
+EXPORT_COLUMNS = [
+    models.Customer.customer_id,
+    models.Customer.first_name,
+    models.Customer.last_name,
+    models.Customer.phone,
+    models.Customer.address,
+    models.Customer.created_at,
+    models.Customer.update_at.label("update"),
+]
+EXPORT_FIELDS = [col.key for col in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def iter_batches(batch_size: int = EXPORT_BATCH_SIZE):
+    """Lotes de filas leídos con stream_results (cursor con nombre en psycopg2)"""
+    with database.engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=batch_size
+        ).execute(select(*EXPORT_COLUMNS).order_by(models.Customer.customer_id))
+        for batch in result.partitions(batch_size):
+            yield batch
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def iter_ndjson(batch_size: int = EXPORT_BATCH_SIZE):
+    for batch in iter_batches(batch_size):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), default=_json_default, ensure_ascii=False) + "\n"
+            for row in batch
+        ).encode()
+
+
+def iter_csv(batch_size: int = EXPORT_BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in iter_batches(batch_size):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in batch
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Cabecera sola si la tabla está vacía
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+EXPORTERS = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
@@ -0,0 +1,38 @@
+"""
+Sparse fieldsets para los endpoints de lectura de customers (?fields=).
+
+Con `fields=customer_id,first_name,last_name` el SELECT proyecta solo esas
+columnas (sin cargar `address` ni construir objetos del ORM). Sin `fields` se
+proyectan todos los campos de schemas.Customer; en ambos casos la respuesta se
+serializa con fast_read desde las filas.
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+
+from .export import EXPORT_COLUMNS
+
+# Campo de la API (mismas claves que schemas.Customer) -> columna
+FIELD_COLUMNS = {column.key: column for column in EXPORT_COLUMNS}
+ALL_FIELDS = list(FIELD_COLUMNS)
+
+
+def parse_fields(fields: Optional[str]):
+    """Lista de campos pedidos (sin repetidos, en orden), o todos si no se indica"""
+    if fields is None:
+        return ALL_FIELDS
+    keys = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not keys:
+        raise HTTPException(status_code=400, detail="fields no puede estar vacío")
+    unknown = [name for name in keys if name not in FIELD_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconocidos: {', '.join(unknown)}. Disponibles: {', '.join(FIELD_COLUMNS)}",
+        )
+    return keys
+
+
+def columns_for(keys, required=()):
+    """Columnas a proyectar: las pedidas más las necesarias para paginar"""
+    return [FIELD_COLUMNS[name] for name in dict.fromkeys(list(keys) + list(required))]
@@ -0,0 +1,226 @@
+"""
+ETags y cache en proceso de respuestas de lectura de customers.
+
+GET /customers/{customer_id} y las páginas de GET /customers/ devuelven un ETag
+fuerte calculado a partir de customer_id + update_at (created_at si la fila nunca
+se actualizó) de cada fila y de la petición (campos, filtros, orden). Con
+If-None-Match igual al ETag actual se responde 304 sin cuerpo.
+
+Además, el cuerpo ya serializado se guarda en un LRU acotado por
+RESPONSE_CACHE_MAX_SIZE: un acierto no consulta Postgres ni serializa. Las
+escrituras invalidan las entradas afectadas (la del customer y todas las páginas
+de listado); las entradas expiran a los RESPONSE_CACHE_TTL_SECONDS porque otras
+instancias (p. ej. en Vercel) no ven esas invalidaciones.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import orjson
+from fastapi import Request, Response
+
+import database
+import fast_read
+from singleflight import coalescer
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5"))
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "1000"))
+
+# Campos (claves de fieldsets) con la versión de la fila; se leen aunque no se pidan
+VERSION_FIELDS = ["customer_id", "created_at", "update"]
+
+# El cliente debe revalidar siempre (con If-None-Match) antes de usar su copia
+CACHE_CONTROL = "no-cache"
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "headers")
+
+    def __init__(self, body: bytes, etag: str, headers: Optional[dict] = None):
+        self.body = body
+        self.etag = etag
+        self.headers = headers or {}
+
+
+class ResponseCache:
+    """LRU con TTL de clave de petición -> respuesta, con índice por customer_id para invalidar"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # clave -> (expira, customer_id o None, respuesta)
+        self._keys_by_customer = {}  # customer_id -> {claves}
+        self._list_keys = set()
+        self._lock = threading.Lock()
+        # Cambia con cada invalidación: una lectura que empezó antes no guarda su resultado
+        self.generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._responses = 0
+        self._conditional = 0
+        self._not_modified = 0
+
+    def get(self, key) -> Optional[CachedResponse]:
+        """Respuesta cacheada para la clave, o None si no hay entrada vigente"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def put(self, key, cached: CachedResponse, generation: int, customer_id: Optional[int] = None):
+        """
+        Guardar la respuesta de un customer (`customer_id`) o de una página de
+        listado (sin customer_id), salvo que haya habido escrituras desde `generation`.
+        """
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + self.ttl, customer_id, cached)
+            if customer_id is None:
+                self._list_keys.add(key)
+            else:
+                self._keys_by_customer.setdefault(customer_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_lists(self):
+        """Eliminar todas las páginas de listado (tras crear un customer)"""
+        # Las lecturas en curso empezaron antes de la escritura: no se comparten más
+        coalescer.invalidate()
+        with self._lock:
+            self.generation += 1
+            for key in list(self._list_keys):
+                self._remove(key)
+                self._invalidations += 1
+
+    def invalidate_customer(self, customer_id: int):
+        """Eliminar las entradas de un customer y todas las páginas de listado (tras modificarlo o borrarlo)"""
+        coalescer.invalidate()
+        with self._lock:
+            self.generation += 1
+            for key in list(self._keys_by_customer.get(customer_id, ())) + list(self._list_keys):
+                self._remove(key)
+                self._invalidations += 1
+
+    def clear(self):
+        """Vaciar el cache (tras operaciones masivas o importaciones)"""
+        coalescer.invalidate()
+        with self._lock:
+            self.generation += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_customer.clear()
+            self._list_keys.clear()
+
+    def _remove(self, key):
+        # Llamar con el lock tomado
+        _, customer_id, _ = self._entries.pop(key)
+        if customer_id is None:
+            self._list_keys.discard(key)
+            return
+        keys = self._keys_by_customer.get(customer_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_customer[customer_id]
+
+    def record_response(self, conditional: bool, not_modified: bool):
+        with self._lock:
+            self._responses += 1
+            self._conditional += conditional
+            self._not_modified += not_modified
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "responses": self._responses,
+                "conditional_requests": self._conditional,
+                "not_modified": self._not_modified,
+                "not_modified_ratio": round(self._not_modified / self._responses, 4) if self._responses else 0.0,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_SIZE)
+
+
+def customer_key(customer_id: int, keys):
+    return ("customer", customer_id, tuple(keys))
+
+
+def list_key(request: Request):
+    """Clave de una página de listado: los parámetros de la petición, en orden estable"""
+    return ("list", tuple(sorted(request.query_params.multi_items())))
+
+
+def lookup(request: Request, key) -> Optional[CachedResponse]:
+    """
+    Respuesta cacheada para la petición. Un cliente que acaba de escribir (lee de
+    la principal, ver database.use_primary) no usa el cache para no ver datos
+    de la réplica anteriores a su escritura.
+    """
+    if database.DATABASE_REPLICA_URL is not None and database.use_primary(request):
+        return None
+    return response_cache.get(key)
+
+
+def make_etag(rows, key) -> str:
+    """ETag fuerte: customer_id + update_at (o created_at) de cada fila y la clave de la petición"""
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=16)
+    for row in rows:
+        mapping = row._mapping
+        version = mapping["update"] or mapping["created_at"]
+        digest.update(f"|{mapping['customer_id']}:{version.isoformat() if version else ''}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def build(content, rows, key, headers: Optional[dict] = None) -> CachedResponse:
+    """Serializar `content` con orjson y calcular su ETag a partir de `rows`"""
+    return CachedResponse(orjson.dumps(content, option=fast_read.ORJSON_OPTIONS), make_etag(rows, key), headers)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): ignora el prefijo W/"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def respond(request: Request, cached: CachedResponse) -> Response:
+    """200 con el cuerpo cacheado, o 304 sin cuerpo si If-None-Match coincide con el ETag"""
+    headers = dict(cached.headers, ETag=cached.etag)
+    headers["Cache-Control"] = CACHE_CONTROL
+    if_none_match = request.headers.get("if-none-match") if request.method == "GET" else None
+    not_modified = if_none_match is not None and etag_matches(if_none_match, cached.etag)
+    response_cache.record_response(if_none_match is not None, not_modified)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,208 @@
+"""
+Importación masiva de customers con COPY de PostgreSQL.
+
+El archivo subido (CSV o NDJSON) se guarda en un archivo temporal mientras llega,
+luego se valida fila a fila contra schemas.CustomerCreate y las filas válidas se
+cargan con COPY en una tabla temporal de staging, desde donde pasan a
+sales.customer con un solo INSERT ... SELECT. Las filas rechazadas van al reporte
+de errores en lugar de abortar toda la carga.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+import database
+from . import models, schemas
+
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+# Bytes que se mantienen en memoria antes de pasar el archivo temporal a disco
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+# Bytes recibidos que se acumulan antes de escribirlos (en el threadpool) al archivo temporal
+IMPORT_WRITE_BYTES = 1024 * 1024
+# Tamaño máximo de un campo CSV; el límite por defecto del módulo csv es 128 KiB
+IMPORT_MAX_FIELD_CHARS = int(os.getenv("IMPORT_MAX_FIELD_CHARS", str(1024 * 1024)))
+csv.field_size_limit(IMPORT_MAX_FIELD_CHARS)
+
+IMPORT_FIELDS = ["first_name", "last_name", "phone", "address"]
+
+# Longitud máxima por columna según el modelo (None = sin límite)
+MAX_LENGTHS = {
+    name: getattr(models.Customer.__table__.c[name].type, "length", None)
+    for name in IMPORT_FIELDS
+}
+
+
+class ImportReport:
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(schemas.ImportRowError(line=line, error=error))
+
+    def result(self) -> schemas.ImportResult:
+        return schemas.ImportResult(
+            accepted=self.accepted,
+            rejected=self.rejected,
+            errors=self.errors,
+            errors_truncated=self.rejected > len(self.errors),
+        )
+
+
+async def spool_upload(chunks):
+    """
+    Guardar el cuerpo de la petición en un archivo temporal a medida que llega.
+    Pasados IMPORT_SPOOL_BYTES el archivo está en disco: las escrituras se hacen
+    en bloques de IMPORT_WRITE_BYTES en el threadpool, no en el event loop.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= IMPORT_WRITE_BYTES:
+            await run_in_threadpool(upload.write, bytes(buffer))
+            buffer.clear()
+    if buffer:
+        await run_in_threadpool(upload.write, bytes(buffer))
+    await run_in_threadpool(upload.seek, 0)
+    return upload
+
+
+def iter_csv_records(text):
+    reader = csv.DictReader(text)
+    missing = {"first_name", "last_name"} - set(reader.fieldnames or [])
+    if missing:
+        yield 1, None, f"Faltan columnas en la cabecera: {', '.join(sorted(missing))}"
+        return
+    records = iter(reader)
+    while True:
+        line_number = reader.line_num
+        try:
+            record = next(records)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # Campo mayor que IMPORT_MAX_FIELD_CHARS, comillas mal cerradas...: se
+            # rechaza el registro (que empieza en la línea siguiente) y se sigue
+            yield line_number + 1, None, f"CSV inválido: {e}"
+            continue
+        # line_num es la última línea leída del registro (la cabecera es la línea 1)
+        values = {name: (record.get(name) or None) for name in IMPORT_FIELDS}
+        yield reader.line_num, values, None
+
+
+def iter_ndjson_records(text):
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Se esperaba un objeto JSON"
+            continue
+        yield line_number, record, None
+
+
+RECORD_READERS = {
+    "csv": iter_csv_records,
+    "ndjson": iter_ndjson_records,
+}
+
+
+def validate_record(record: dict):
+    """CustomerCreate validado o mensaje de error"""
+    try:
+        customer = schemas.CustomerCreate(**record)
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+        )
+    for name, max_length in MAX_LENGTHS.items():
+        value = getattr(customer, name)
+        if max_length and value is not None and len(value) > max_length:
+            return None, f"{name}: máximo {max_length} caracteres"
+        # Postgres no admite el byte NUL en columnas de texto: haría fallar todo el COPY
+        if value is not None and "\x00" in value:
+            return None, f"{name}: contiene el carácter NUL"
+    return customer, None
+
+
+def copy_csv_field(value) -> str:
+    """
+    Campo para COPY ... (FORMAT csv): NULL sin comillas y los textos siempre entre
+    comillas, para que un texto vacío no se cargue como NULL
+    """
+    if value is None:
+        return ""
+    return '"' + value.replace('"', '""') + '"'
+
+
+def stage_valid_rows(upload, format: str, report: ImportReport):
+    """Validar el archivo y escribir las filas válidas en formato CSV para COPY"""
+    staged = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES, mode="w+", newline="")
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    try:
+        for line_number, record, error in RECORD_READERS[format](text):
+            if error is None:
+                customer, error = validate_record(record)
+            if error is not None:
+                report.reject(line_number, error)
+                continue
+            staged.write(",".join(copy_csv_field(getattr(customer, name)) for name in IMPORT_FIELDS) + "\n")
+            report.accepted += 1
+    except UnicodeDecodeError:
+        staged.close()
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+    staged.seek(0)
+    return staged
+
+
+def copy_into_customers(staged):
+    """COPY a una tabla temporal de staging y de ahí a sales.customer (una transacción)"""
+    columns = ", ".join(IMPORT_FIELDS)
+    connection = database.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE customer_import_stage (
+                first_name VARCHAR(100),
+                last_name VARCHAR(100),
+                phone VARCHAR(20),
+                address TEXT
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert(f"COPY customer_import_stage ({columns}) FROM STDIN WITH (FORMAT csv)", staged)
+        cursor.execute(f"INSERT INTO sales.customer ({columns}) SELECT {columns} FROM customer_import_stage")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def load(upload, format: str) -> schemas.ImportResult:
+    """Validar y cargar un archivo ya recibido"""
+    report = ImportReport()
+    try:
+        staged = stage_valid_rows(upload, format, report)
+    finally:
+        upload.close()
+    try:
+        if report.accepted:
+            copy_into_customers(staged)
+    finally:
+        staged.close()
+    return report.result()
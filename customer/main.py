@@ -1,14 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import update, text
+from sqlalchemy import delete, insert, select, update, text
 from datetime import datetime
-from . import models, schemas, database
-from .database import get_db
-from typing import List
+from . import models, schemas, database, batch, bulk, export, fieldsets, importer, search, http_cache
+from .http_cache import response_cache
+from .database import get_db, get_read_db
+from typing import List, Literal, Optional
+import fast_read
+import pagination
+from singleflight import coalescer, flight_key
 
 # Las tablas deben existir previamente en Supabase
 # No crear tablas automáticamente en serverless para evitar errores de conexión
 
+# Columnas por las que se puede paginar con cursor (todas NOT NULL)
+SORT_COLUMNS = {
+    "customer_id": models.Customer.customer_id,
+    "created_at": models.Customer.created_at,
+    "last_name": models.Customer.last_name,
+}
+
+# Orden de list_customers: columna de SORT_COLUMNS, con "-" para descendente
+SortField = Literal[
+    "customer_id", "-customer_id", "created_at", "-created_at", "last_name", "-last_name"
+]
+
 router = APIRouter(
     prefix="/customers",
     tags=["customers"],
@@ -91,47 +109,258 @@ def debug_database(db: Session = Depends(get_db)):
 #este endpoint respondera a peticiones en la ruta /customers/, luego la respuesta 
 #sera convertida al modelo customer para asi los datos devueltos tengan el formato correcto
 def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_db)):
-#
-    db_customer = models.Customer(**customer.dict())
-    db.add(db_customer)
+    # INSERT ... RETURNING: la fila creada vuelve en la misma sentencia (sin refresh)
+    db_customer = db.execute(
+        insert(models.Customer).values(**customer.dict()).returning(models.Customer)
+    ).scalar_one()
     db.commit()
-    db.refresh(db_customer)
+    response_cache.invalidate_lists()
     return db_customer
 
+def escape_like(value: str) -> str:
+    """Escapar los comodines de LIKE para usar `value` como prefijo literal"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def customer_filters(
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    last_name_prefix: Optional[str] = None,
+    has_phone: Optional[bool] = None,
+):
+    """
+    Filtros de list_customers como condiciones SQL (dependencia compartida con
+    customer.main_async). created_from es inclusivo y created_to exclusivo.
+    """
+    if created_from is not None and created_to is not None and created_from > created_to:
+        raise HTTPException(status_code=400, detail="created_from debe ser anterior a created_to")
+
+    conditions = []
+    if created_from is not None:
+        conditions.append(models.Customer.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(models.Customer.created_at < created_to)
+    if last_name_prefix:
+        if len(last_name_prefix) > 100:
+            raise HTTPException(status_code=400, detail="last_name_prefix: máximo 100 caracteres")
+        # Prefijo constante: usa el índice text_pattern_ops de create_indexes.sql
+        conditions.append(models.Customer.last_name.like(escape_like(last_name_prefix) + "%", escape="\\"))
+    if has_phone is not None:
+        conditions.append(models.Customer.phone.isnot(None) if has_phone else models.Customer.phone.is_(None))
+    return conditions
+
+def list_statement(conditions, sort: str, cursor: Optional[str], skip: int, limit: int, columns=None):
+    """
+    SELECT de list_customers: filtros, orden determinista y paginación.
+    Con `columns` proyecta solo esas columnas en lugar de la entidad completa.
+    """
+    descending = sort.startswith("-")
+    sort_column = SORT_COLUMNS[sort.lstrip("-")]
+    query = (select(*columns) if columns else select(models.Customer)).where(*conditions)
+    if cursor is None:
+        return query.order_by(
+            *pagination.order_columns(sort_column, models.Customer.customer_id, descending)
+        ).offset(skip).limit(limit)
+    return pagination.apply_keyset(
+        query, sort, sort_column, models.Customer.customer_id, cursor, limit, descending
+    )
+
+def next_cursor_headers(customers, sort: str, limit: int) -> dict:
+    """Header X-Next-Cursor de una página por keyset (vacío en la última página)"""
+    next_cursor = pagination.next_cursor(customers, sort, sort.lstrip("-"), "customer_id", limit)
+    return {pagination.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
 @router.get("/", response_model=List[schemas.Customer])
-def list_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    customers = db.query(models.Customer).offset(skip).limit(limit).all()
-    return customers
+def list_customers(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: SortField = "customer_id",
+    conditions: list = Depends(customer_filters),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Listar customers.
+    Sin `cursor` se pagina con skip/limit. Con `cursor` (vacío para la primera página)
+    se pagina por keyset sobre `sort` + customer_id y el cursor de la siguiente
+    página se devuelve en el header X-Next-Cursor.
+    Filtros opcionales: created_from / created_to, last_name_prefix y has_phone.
+    `sort` acepta el prefijo "-" para orden descendente.
+    Con `fields` (p. ej. customer_id,first_name,last_name) solo se leen y devuelven esos campos.
+    La respuesta lleva ETag y se cachea en proceso (ver customer/http_cache.py).
+    """
+    keys = fieldsets.parse_fields(fields)
+    key = http_cache.list_key(request)
+    cached = http_cache.lookup(request, key)
+    if cached is None:
+        # Peticiones concurrentes con los mismos parámetros comparten una sola lectura
+        cached = coalescer.do(
+            flight_key(key, db), lambda: fetch_page(db, conditions, sort, cursor, skip, limit, keys, key)
+        )
+    return http_cache.respond(request, cached)
+
+def fetch_page(db: Session, conditions, sort: str, cursor: Optional[str], skip: int, limit: int, keys, key):
+    """Leer, serializar y cachear una página de list_customers"""
+    generation = response_cache.generation
+    # Lectura sin ORM: filas de Core serializadas con orjson (ver fast_read)
+    columns = fieldsets.columns_for(keys, required=[sort.lstrip("-")] + http_cache.VERSION_FIELDS)
+    customers = db.execute(list_statement(conditions, sort, cursor, skip, limit, columns)).all()
+    headers = next_cursor_headers(customers, sort, limit) if cursor is not None else None
+    cached = http_cache.build(fast_read.row_dicts(customers, keys), customers, key, headers)
+    response_cache.put(key, cached, generation)
+    return cached
+
+def validate_search(q: str, limit: int) -> str:
+    """Término de búsqueda sin espacios sobrantes y límite dentro del máximo"""
+    q = q.strip()
+    if len(q) < 2:
+        raise HTTPException(status_code=400, detail="La búsqueda debe tener al menos 2 caracteres")
+    if not 1 <= limit <= search.SEARCH_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit debe estar entre 1 y {search.SEARCH_MAX_LIMIT}")
+    return q
+
+@router.get("/search", response_model=List[schemas.Customer])
+def search_customers(q: str, limit: int = 20, db: Session = Depends(get_db)):
+    """
+    Buscar customers por nombre, apellido, teléfono o dirección, ordenados por
+    relevancia (full-text + trigramas, ver customer/search.py)
+    """
+    q = validate_search(q, limit)
+    return db.execute(search.search_statement(q, limit)).scalars().all()
+
+@router.get("/batch", response_model=schemas.CustomerBatch)
+def get_customers_batch(ids: str, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """
+    Varios customers por id (ids=1,2,3) en una sola consulta, en el orden pedido.
+    Los ids inexistentes se devuelven en `missing`. Admite `fields` igual que get_customer.
+    """
+    customer_ids = batch.parse_ids(ids)
+    keys = fieldsets.parse_fields(fields)
+    rows = db.execute(batch.batch_statement(customer_ids, fieldsets.columns_for(keys, required=["customer_id"]))).all()
+    return fast_read.render(batch.in_input_order(customer_ids, rows, keys))
+
+@router.get("/export")
+def export_customers(format: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Exportar todos los customers en streaming (NDJSON o CSV).
+    La memoria es constante: las filas se leen por lotes con un cursor del servidor.
+    """
+    return StreamingResponse(
+        export.EXPORTERS[format](),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="customers.{format}"'},
+    )
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_customers(request: Request, format: Literal["csv", "ndjson"] = "csv"):
+    """
+    Importar customers desde el cuerpo de la petición (CSV con cabecera o NDJSON).
+    Las filas válidas se cargan con COPY en una transacción; las inválidas se
+    devuelven en el reporte de errores.
+    """
+    upload = await importer.spool_upload(request.stream())
+    result = await run_in_threadpool(importer.load, upload, format)
+    response_cache.clear()
+    return result
+
+# Operaciones masivas: deben declararse antes de las rutas /{customer_id}
+
+def validate_bulk_ids(customer_ids: List[int]):
+    """Validar tamaño del lote y que no haya ids repetidos"""
+    if len(customer_ids) > bulk.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo {bulk.BULK_MAX_ITEMS} elementos por petición")
+    seen = set()
+    for index, customer_id in enumerate(customer_ids):
+        if customer_id in seen:
+            raise HTTPException(status_code=400, detail=f"customer_id {customer_id} repetido en la posición {index}")
+        seen.add(customer_id)
+
+@router.post("/bulk", response_model=schemas.BulkResult)
+def create_customers_bulk(customers: List[schemas.CustomerCreate], db: Session = Depends(get_db)):
+    """Crear customers en lote (un INSERT multi-fila por chunk, una transacción)"""
+    if len(customers) > bulk.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo {bulk.BULK_MAX_ITEMS} elementos por petición")
+    results = bulk.insert_customers(db, customers, bulk.BULK_CHUNK_SIZE)
+    db.commit()
+    response_cache.clear()
+    return bulk.summarize(results)
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def update_customers_bulk(customers: List[schemas.CustomerBulkUpdate], db: Session = Depends(get_db)):
+    """Actualizar customers en lote (un UPDATE ... FROM VALUES por chunk, una transacción)"""
+    validate_bulk_ids([customer.customer_id for customer in customers])
+    results = bulk.update_customers(db, customers, bulk.BULK_CHUNK_SIZE)
+    db.commit()
+    response_cache.clear()
+    return bulk.summarize(results)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def delete_customers_bulk(customer_ids: List[int], db: Session = Depends(get_db)):
+    """Eliminar customers en lote (un DELETE ... IN por chunk, una transacción)"""
+    validate_bulk_ids(customer_ids)
+    results = bulk.delete_customers(db, customer_ids, bulk.BULK_CHUNK_SIZE)
+    db.commit()
+    response_cache.clear()
+    return bulk.summarize(results)
 
 @router.get("/{customer_id}", response_model=schemas.Customer)
-def get_customer(customer_id: int, db: Session = Depends(get_db)):
-    customer = db.query(models.Customer).filter(models.Customer.customer_id == customer_id).first()
-    if customer is None:
+def get_customer(
+    customer_id: int, request: Request, fields: Optional[str] = None, db: Session = Depends(get_read_db)
+):
+    """Customer por id, con ETag (If-None-Match -> 304) y cache en proceso"""
+    keys = fieldsets.parse_fields(fields)
+    key = http_cache.customer_key(customer_id, keys)
+    cached = http_cache.lookup(request, key)
+    if cached is None:
+        cached = coalescer.do(flight_key(key, db), lambda: fetch_customer(db, customer_id, keys, key))
+    return http_cache.respond(request, cached)
+
+def fetch_customer(db: Session, customer_id: int, keys, key):
+    """Leer, serializar y cachear un customer para get_customer"""
+    generation = response_cache.generation
+    row = db.execute(
+        select(*fieldsets.columns_for(keys, required=http_cache.VERSION_FIELDS))
+        .where(models.Customer.customer_id == customer_id)
+    ).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return customer
+    cached = http_cache.build(fast_read.row_dicts([row], keys)[0], [row], key)
+    response_cache.put(key, cached, generation, customer_id)
+    return cached
 
 @router.put("/{customer_id}", response_model=schemas.Customer)
-def update_customer(customer_id: int, customer: schemas.CustomerUpdate, db: Session = Depends(get_db)):
-    db_customer = db.query(models.Customer).filter(models.Customer.customer_id == customer_id).first()
+def update_customer(
+    customer_id: int, customer: schemas.CustomerUpdate, request: Request, db: Session = Depends(get_db)
+):
+    update_data = customer.dict(exclude_unset=True)
+    if not update_data:
+        return get_customer(customer_id, request, db=db)
+
+    # UPDATE ... RETURNING: un solo round trip en lugar de SELECT + UPDATE + refresh
+    update_data["update_at"] = datetime.now()
+    db_customer = db.execute(
+        update(models.Customer)
+        .where(models.Customer.customer_id == customer_id)
+        .values(**update_data)
+        .returning(models.Customer)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).scalar_one_or_none()
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    
-    update_data = customer.dict(exclude_unset=True)
-    if update_data:
-        update_data["update"] = datetime.now()
-        for key, value in update_data.items():
-            setattr(db_customer, key, value)
-        
-        db.commit()
-        db.refresh(db_customer)
+    db.commit()
+    response_cache.invalidate_customer(customer_id)
     return db_customer
 
 @router.delete("/{customer_id}")
 def delete_customer(customer_id: int, db: Session = Depends(get_db)):
-    customer = db.query(models.Customer).filter(models.Customer.customer_id == customer_id).first()
-    if customer is None:
+    deleted_id = db.execute(
+        delete(models.Customer)
+        .where(models.Customer.customer_id == customer_id)
+        .returning(models.Customer.customer_id)
+    ).scalar_one_or_none()
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    
-    db.delete(customer)
     db.commit()
+    response_cache.invalidate_customer(customer_id)
     return {"message": "Customer deleted successfully"}
@@ -0,0 +1,179 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, select, text, update
+from datetime import datetime
+from . import models, schemas, batch, fieldsets, search, http_cache
+from .http_cache import response_cache
+from .database import get_async_db, get_read_async_db
+from .main import SortField, customer_filters, list_statement, next_cursor_headers, validate_search
+from typing import List, Optional
+import fast_read
+from singleflight import coalescer, flight_key
+
+# Versión async de los endpoints de customers (DB_MODE=async).
+# Las rutas que no están aquí se sirven con la implementación sync de customer.main
+
+router = APIRouter(
+    prefix="/customers",
+    tags=["customers"],
+)
+
+@router.get("/debug")
+async def debug_database(db: AsyncSession = Depends(get_async_db)):
+    """Endpoint de debug para probar la conexión a la base de datos (async)"""
+    try:
+        result = await db.execute(text("SELECT 1 as test"))
+        test_result = result.scalar()
+
+        table_check = await db.execute(text("""
+            SELECT EXISTS (
+                SELECT FROM information_schema.tables
+                WHERE table_schema = 'sales'
+                AND table_name = 'customer'
+            )
+        """))
+        table_exists = table_check.scalar()
+
+        schema_check = await db.execute(text("""
+            SELECT EXISTS (
+                SELECT FROM information_schema.schemata
+                WHERE schema_name = 'sales'
+            )
+        """))
+        schema_exists = schema_check.scalar()
+
+        return {
+            "message": "Conexión a base de datos exitosa",
+            "test_query": test_result,
+            "sales_schema_exists": schema_exists,
+            "customer_table_exists": table_exists,
+            "status": "ok"
+        }
+
+    except Exception as e:
+        return {
+            "message": "Error en la conexión a base de datos",
+            "error": str(e),
+            "status": "error"
+        }
+
+@router.post("/", response_model=schemas.Customer)
+async def create_customer(customer: schemas.CustomerCreate, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(
+        insert(models.Customer).values(**customer.dict()).returning(models.Customer)
+    )
+    db_customer = result.scalar_one()
+    await db.commit()
+    response_cache.invalidate_lists()
+    return db_customer
+
+@router.get("/", response_model=List[schemas.Customer])
+async def list_customers(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: SortField = "customer_id",
+    conditions: list = Depends(customer_filters),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_async_db)
+):
+    """
+    Listar customers (async). Mismos filtros y paginación que customer.main.list_customers.
+    """
+    keys = fieldsets.parse_fields(fields)
+    key = http_cache.list_key(request)
+    cached = http_cache.lookup(request, key)
+    if cached is None:
+        cached = await coalescer.do_async(
+            flight_key(key, db), lambda: fetch_page(db, conditions, sort, cursor, skip, limit, keys, key)
+        )
+    return http_cache.respond(request, cached)
+
+async def fetch_page(db: AsyncSession, conditions, sort: str, cursor: Optional[str], skip: int, limit: int, keys, key):
+    """fetch_page de customer.main con sesión async"""
+    generation = response_cache.generation
+    columns = fieldsets.columns_for(keys, required=[sort.lstrip("-")] + http_cache.VERSION_FIELDS)
+    result = await db.execute(list_statement(conditions, sort, cursor, skip, limit, columns))
+    customers = result.all()
+    headers = next_cursor_headers(customers, sort, limit) if cursor is not None else None
+    cached = http_cache.build(fast_read.row_dicts(customers, keys), customers, key, headers)
+    response_cache.put(key, cached, generation)
+    return cached
+
+@router.get("/search", response_model=List[schemas.Customer])
+async def search_customers(q: str, limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    """Buscar customers (async). Misma búsqueda que customer.main.search_customers"""
+    q = validate_search(q, limit)
+    result = await db.execute(search.search_statement(q, limit))
+    return result.scalars().all()
+
+@router.get("/batch", response_model=schemas.CustomerBatch)
+async def get_customers_batch(ids: str, fields: Optional[str] = None, db: AsyncSession = Depends(get_read_async_db)):
+    """Varios customers por id (async). Misma consulta que customer.main.get_customers_batch"""
+    customer_ids = batch.parse_ids(ids)
+    keys = fieldsets.parse_fields(fields)
+    result = await db.execute(batch.batch_statement(customer_ids, fieldsets.columns_for(keys, required=["customer_id"])))
+    return fast_read.render(batch.in_input_order(customer_ids, result.all(), keys))
+
+@router.get("/{customer_id}", response_model=schemas.Customer)
+async def get_customer(
+    customer_id: int, request: Request, fields: Optional[str] = None, db: AsyncSession = Depends(get_read_async_db)
+):
+    """Customer por id (async), con el mismo ETag y cache que customer.main.get_customer"""
+    keys = fieldsets.parse_fields(fields)
+    key = http_cache.customer_key(customer_id, keys)
+    cached = http_cache.lookup(request, key)
+    if cached is None:
+        cached = await coalescer.do_async(flight_key(key, db), lambda: fetch_customer(db, customer_id, keys, key))
+    return http_cache.respond(request, cached)
+
+async def fetch_customer(db: AsyncSession, customer_id: int, keys, key):
+    """fetch_customer de customer.main con sesión async"""
+    generation = response_cache.generation
+    result = await db.execute(
+        select(*fieldsets.columns_for(keys, required=http_cache.VERSION_FIELDS))
+        .where(models.Customer.customer_id == customer_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    cached = http_cache.build(fast_read.row_dicts([row], keys)[0], [row], key)
+    response_cache.put(key, cached, generation, customer_id)
+    return cached
+
+@router.put("/{customer_id}", response_model=schemas.Customer)
+async def update_customer(
+    customer_id: int, customer: schemas.CustomerUpdate, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    update_data = customer.dict(exclude_unset=True)
+    if not update_data:
+        return await get_customer(customer_id, request, db=db)
+
+    update_data["update_at"] = datetime.now()
+    result = await db.execute(
+        update(models.Customer)
+        .where(models.Customer.customer_id == customer_id)
+        .values(**update_data)
+        .returning(models.Customer)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    db_customer = result.scalar_one_or_none()
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    await db.commit()
+    response_cache.invalidate_customer(customer_id)
+    return db_customer
+
+@router.delete("/{customer_id}")
+async def delete_customer(customer_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(
+        delete(models.Customer)
+        .where(models.Customer.customer_id == customer_id)
+        .returning(models.Customer.customer_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    await db.commit()
+    response_cache.invalidate_customer(customer_id)
+    return {"message": "Customer deleted successfully"}
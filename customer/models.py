@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, text
+from sqlalchemy.orm import synonym
 from .database import Base
 
 class Customer(Base):
@@ -13,3 +14,5 @@ class Customer(Base):
     created_at = Column(TIMESTAMP, nullable=False, server_default=text('NOW()'))
     # Usar quotes para la palabra reservada 'update' y hacerla nullable
     update_at = Column(TIMESTAMP, nullable=True)
+    # schemas.Customer expone la columna como "update"
+    update = synonym("update_at")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class CustomerBase(BaseModel):
@@ -22,3 +22,31 @@ class Customer(CustomerBase):
 
     class Config:
         from_attributes = True
+
+class CustomerBatch(BaseModel):
+    customers: List[Customer]
+    missing: List[int]
+
+class CustomerBulkUpdate(CustomerUpdate):
+    customer_id: int
+
+class BulkItemResult(BaseModel):
+    index: int
+    customer_id: Optional[int] = None
+    status: str  # created | updated | deleted | not_found | invalid
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportResult(BaseModel):
+    accepted: int
+    rejected: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
@@ -0,0 +1,42 @@
+"""
+Búsqueda de customers por texto (GET /customers/search).
+
+Combina full-text search de PostgreSQL (palabras completas, con ranking) con
+similitud por trigramas de pg_trgm (prefijos, errores de tipeo, teléfonos
+parciales) sobre first_name, last_name, phone y address. Ambos filtros usan los
+índices GIN de create_indexes.sql: las expresiones de la consulta llaman a las
+mismas funciones sales.customer_search_text / sales.customer_search_vector.
+"""
+import os
+
+from sqlalchemy import cast, func, literal, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from . import models
+
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "100"))
+# Configuración de text search: 'simple' no aplica stemming (nombres, teléfonos)
+SEARCH_CONFIG = "simple"
+
+_COLUMNS = (
+    models.Customer.first_name,
+    models.Customer.last_name,
+    models.Customer.phone,
+    models.Customer.address,
+)
+
+
+def search_statement(q: str, limit: int):
+    """SELECT de los customers que coinciden con `q`, ordenados por relevancia"""
+    document = func.sales.customer_search_text(*_COLUMNS)
+    vector = func.sales.customer_search_vector(*_COLUMNS)
+    query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+    term = literal(q)
+
+    rank = func.ts_rank(vector, query) + func.word_similarity(term, document)
+    return (
+        select(models.Customer)
+        .where(vector.bool_op("@@")(query) | term.bool_op("<%")(document))
+        .order_by(rank.desc(), models.Customer.customer_id)
+        .limit(limit)
+    )
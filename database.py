@@ -2,11 +2,19 @@
 Configuración unificada de base de datos optimizada para entorno serverless (Vercel)
 """
 import os
-from sqlalchemy import create_engine, pool, text
+import threading
+import time
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc, pool, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.engine import make_url
 from urllib.parse import quote_plus
 
+# Modo de acceso a base de datos para los routers: "sync" (Session en el threadpool)
+# o "async" (AsyncSession sobre asyncpg, sin ocupar threads mientras espera I/O)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
 # Configuración de variables de entorno con fallbacks para desarrollo local
 def get_database_url():
     # Obtener la URL completa de la variable de entorno
@@ -38,41 +46,217 @@ def get_database_url():
     base_url = f"postgresql://{db_user}:{encoded_password}@{db_host}:{db_port}/{db_name}"
     return f"{base_url}?sslmode=require&connect_timeout=30"
 
-# Configuración optimizada para serverless
-SQLALCHEMY_DATABASE_URL = get_database_url()
+# La URL y el engine se crean en el primer uso y no al importar, para que el
+# cold start de Vercel no pague la construcción del engine
+_database_url = None
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_sqlalchemy_database_url() -> str:
+    """URL de conexión (calculada una sola vez)"""
+    global _database_url
+    if _database_url is None:
+        _database_url = get_database_url()
+    return _database_url
+
+# Estrategia de pool: "null" (una conexión por uso, ideal en serverless/Vercel) o
+# "queue" (conexiones reutilizadas, para uvicorn en hosts de larga duración)
+# (por defecto null si existe VERCEL y queue en cualquier otro host)
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "null" if os.getenv("VERCEL") else "queue").lower()
+if DB_POOL_MODE not in ("null", "queue"):
+    raise ValueError(f"DB_POOL_MODE no soportado: {DB_POOL_MODE} (null o queue)")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SSL de la conexión: "require" para Supabase; "disable" para un Postgres local
+# (p. ej. el de benchmarks/local_postgres.py)
+DB_SSLMODE = os.getenv("DB_SSLMODE", "require")
+
+def is_pgbouncer_url(url) -> bool:
+    """
+    Detecta pgbouncer en modo transacción (Supabase pooler en el puerto 6543 o
+    ?pgbouncer=true en la URL)
+    """
+    url = make_url(url)
+    return (
+        url.port == 6543
+        or "pooler.supabase.com" in (url.host or "")
+        or url.query.get("pgbouncer") == "true"
+    )
+
+class PoolMetrics:
+    """Contadores de checkout del pool: en uso, tiempo de espera y timeouts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def checked_out(self, delta: int):
+        with self._lock:
+            self.in_use += delta
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+
+class TimedCheckoutMixin:
+    """Mide cuánto espera cada checkout por una conexión libre del pool"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self._metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self._metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool._metrics = self._metrics
+        return new_pool
+
+class TimedQueuePool(TimedCheckoutMixin, pool.QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(TimedCheckoutMixin, pool.AsyncAdaptedQueuePool):
+    pass
+
+def pool_options(queue_pool_class) -> dict:
+    """Argumentos de create_engine según DB_POOL_MODE"""
+    if DB_POOL_MODE == "null":
+        return {"poolclass": pool.NullPool}
+    return {
+        "poolclass": queue_pool_class,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def instrument_pool(engine):
+    """Registrar las métricas del pool de un engine (sync o el sync_engine de uno async)"""
+    metrics = PoolMetrics()
+    engine.pool._metrics = metrics
+    event.listen(engine, "checkout", lambda *args: metrics.checked_out(1))
+    event.listen(engine, "checkin", lambda *args: metrics.checked_out(-1))
+    return engine
+
+def get_pool_stats(engine) -> dict:
+    """Estado del pool para el endpoint interno"""
+    engine_pool = engine.pool
+    stats = {"mode": DB_POOL_MODE, "class": type(engine_pool).__name__}
+    if isinstance(engine_pool, pool.QueuePool):
+        stats.update({
+            "size": engine_pool.size(),
+            "checked_in": engine_pool.checkedin(),
+            "overflow": max(0, engine_pool.overflow()),
+            "max_overflow": DB_MAX_OVERFLOW,
+        })
+    metrics = getattr(engine_pool, "_metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
 
 # Configuración del engine optimizada para Vercel/serverless
 # Solución para el error "Cannot assign requested address" en IPv6
-def create_optimized_engine():
+def create_optimized_engine(database_url=None):
     """
     Crea un engine con configuración específica para resolver problemas de IPv6 en Vercel
+    y la estrategia de pool de DB_POOL_MODE (por defecto contra la base de datos principal)
     """
     # Configuración de conexión optimizada para Connection Pooling de Supabase
     connect_args = {
-        "sslmode": "require",
+        "sslmode": DB_SSLMODE,
         "connect_timeout": 30,
         "application_name": "fastapi-vercel"
     }
     
-    # NullPool es lo mejor para pgbouncer y serverless
+    # libpq no acepta el parámetro pgbouncer en la URL
+    url = make_url(database_url or get_sqlalchemy_database_url()).difference_update_query(["pgbouncer"])
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        poolclass=pool.NullPool,  # NullPool es ideal para pgbouncer
+        url,
         connect_args=connect_args,
         echo=False,  # Cambiar a True para debug si es necesario
+        **pool_options(TimedQueuePool),
     )
+    instrument_pool(engine)
     
-    print("✅ Engine creado exitosamente (conexión se probará cuando se use)")
+    print(f"✅ Engine creado exitosamente (pool: {DB_POOL_MODE}, conexión se probará cuando se use)")
     return engine
 
-# Crear el engine usando la función optimizada
-engine = create_optimized_engine()
+def get_engine():
+    """Engine sync, creado en el primer uso"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_optimized_engine()
+    return _engine
+
+# Réplica de lectura opcional: los handlers de solo lectura usan get_read_db y el
+# resto sigue en la base de datos principal. Tras una escritura el cliente queda
+# DB_REPLICA_STICKY_SECONDS en la principal (read-your-writes)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+_replica_engine = None
+
+def get_replica_engine():
+    """Engine de la réplica (creado en el primer uso), o None si no está configurada"""
+    global _replica_engine
+    if DATABASE_REPLICA_URL is None:
+        return None
+    if _replica_engine is None:
+        with _engine_lock:
+            if _replica_engine is None:
+                _replica_engine = create_optimized_engine(DATABASE_REPLICA_URL)
+    return _replica_engine
+
+def __getattr__(name):
+    # Compatibilidad con `from database import engine` / database.SQLALCHEMY_DATABASE_URL
+    if name == "engine":
+        return get_engine()
+    if name == "SQLALCHEMY_DATABASE_URL":
+        return get_sqlalchemy_database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class LazyEngineSession(Session):
+    """Session que obtiene el engine al ejecutar la primera consulta"""
+
+    def get_bind(self, mapper=None, **kw):
+        if self.bind is None:
+            self.bind = get_engine()
+        return super().get_bind(mapper, **kw)
 
 # SessionLocal con configuración para serverless
 SessionLocal = sessionmaker(
+    class_=LazyEngineSession,
     autocommit=False, 
     autoflush=False, 
-    bind=engine,
     expire_on_commit=False  # Importante para serverless
 )
 
@@ -90,6 +274,153 @@ def get_db():
     finally:
         db.close()
 
+# Marca de stickiness: cookie para navegadores y header para clientes de API
+STICKY_COOKIE = "db_primary_until"
+STICKY_HEADER = "X-DB-Primary-Until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+def use_primary(request) -> bool:
+    """True si no hay réplica o si el cliente escribió hace menos de DB_REPLICA_STICKY_SECONDS"""
+    if DATABASE_REPLICA_URL is None:
+        return True
+    marker = request.cookies.get(STICKY_COOKIE) or request.headers.get(STICKY_HEADER)
+    try:
+        return marker is not None and float(marker) > time.time()
+    except ValueError:
+        return False
+
+def get_read_db(request: Request):
+    """
+    Dependency para handlers de solo lectura: sesión sobre la réplica si está
+    configurada y el cliente no acaba de escribir; si no, igual que get_db.
+    """
+    if use_primary(request):
+        db = SessionLocal()
+    else:
+        db = SessionLocal(bind=get_replica_engine(), info={"replica": True})
+    try:
+        yield db
+    finally:
+        db.close()
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI: tras una escritura exitosa marca al cliente (cookie y header)
+    para que sus lecturas vayan a la principal durante DB_REPLICA_STICKY_SECONDS
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or DATABASE_REPLICA_URL is None or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = f"{time.time() + DB_REPLICA_STICKY_SECONDS:.3f}"
+                cookie = (f"{STICKY_COOKIE}={until}; Max-Age={DB_REPLICA_STICKY_SECONDS}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode()),
+                    (STICKY_HEADER.lower().encode(), until.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
+
+# Engine async (asyncpg): se crea solo si se usa el modo async
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_database_url(database_url=None):
+    """
+    Convierte la URL de psycopg2 a la de asyncpg.
+    asyncpg no acepta sslmode/connect_timeout en la URL; se pasan en connect_args.
+    """
+    database_url = database_url or get_sqlalchemy_database_url()
+    url = make_url(database_url).set(drivername="postgresql+asyncpg")
+    url = url.difference_update_query(["sslmode", "connect_timeout", "pgbouncer"])
+    if is_pgbouncer_url(database_url):
+        # pgbouncer en modo transacción no soporta prepared statements con nombre
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+    return url
+
+def create_optimized_async_engine(database_url=None):
+    """
+    Engine async con la misma configuración que el sync (DB_POOL_MODE)
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    database_url = database_url or get_sqlalchemy_database_url()
+    connect_args = {
+        "ssl": DB_SSLMODE,
+        "timeout": 30,
+        "server_settings": {"application_name": "fastapi-vercel"},
+    }
+    if is_pgbouncer_url(database_url):
+        connect_args["statement_cache_size"] = 0
+
+    engine = create_async_engine(
+        get_async_database_url(database_url),
+        connect_args=connect_args,
+        echo=False,
+        **pool_options(TimedAsyncAdaptedQueuePool),
+    )
+    instrument_pool(engine.sync_engine)
+    return engine
+
+def get_async_engine():
+    """Engine async de la base de datos principal, creado en el primer uso"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_engine = create_optimized_async_engine()
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        print(f"✅ Engine async creado exitosamente (pool: {DB_POOL_MODE})")
+    return _async_engine
+
+_async_replica_engine = None
+
+def get_async_replica_engine():
+    """Engine async de la réplica, o None si DATABASE_REPLICA_URL no está configurada"""
+    global _async_replica_engine
+    if DATABASE_REPLICA_URL is None:
+        return None
+    if _async_replica_engine is None:
+        _async_replica_engine = create_optimized_async_engine(DATABASE_REPLICA_URL)
+    return _async_replica_engine
+
+def async_primary_session():
+    """AsyncSession sobre la principal para usar fuera de una dependency"""
+    get_async_engine()
+    return _AsyncSessionLocal()
+
+# Dependency async equivalente a get_db
+async def get_async_db():
+    """
+    Dependency que proporciona sesiones async de base de datos.
+    """
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_async_db(request: Request):
+    """Equivalente async de get_read_db"""
+    get_async_engine()
+    if use_primary(request):
+        session = _AsyncSessionLocal()
+    else:
+        session = _AsyncSessionLocal(bind=get_async_replica_engine(), info={"replica": True})
+    async with session as db:
+        yield db
+
 # Función para verificar la conexión
 def test_connection():
     """
@@ -97,7 +428,7 @@ def test_connection():
     Útil para debugging.
     """
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             result = connection.execute("SELECT 1")
             return True
     except Exception as e:
@@ -0,0 +1,48 @@
+"""
+Ruta de lectura sin ORM compartida por los routers de customers y autenticación.
+
+Los endpoints de lectura ejecutan un select() de Core con las columnas del
+response_model y serializan las filas con orjson, sin hidratar objetos del ORM
+ni validar cada fila con pydantic. El response_model se mantiene en la ruta, de
+modo que el esquema OpenAPI no cambia.
+"""
+from typing import Optional
+
+import orjson
+from fastapi.responses import Response
+
+# OPT_UTC_Z: las fechas UTC salen con "Z", igual que las serializa pydantic
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def row_dicts(rows, keys):
+    """Filas de Core como dicts con solo las claves pedidas"""
+    return [{name: row._mapping[name] for name in keys} for row in rows]
+
+
+def render(content, response: Optional[Response] = None) -> Response:
+    """
+    Respuesta JSON ya serializada (sin validación del response_model).
+    Conserva los headers ya puestos en `response` (p. ej. X-Next-Cursor).
+    """
+    headers = None
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return ORJSONResponse(content, headers=headers)
+
+
+def copy(response: Response) -> Response:
+    """
+    Respuesta nueva con el mismo cuerpo y headers: una respuesta compartida entre
+    peticiones (ver singleflight) no se envía directamente porque los middlewares
+    modifican sus headers.
+    """
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return Response(response.body, status_code=response.status_code, headers=headers)
@@ -0,0 +1,86 @@
+"""
+Endpoints internos de diagnóstico (estado de colas, caches y pools)
+
+Exponen datos de operación, así que solo responden con INTERNAL_TOKEN
+configurado y enviado como "Authorization: Bearer <token>". Sin INTERNAL_TOKEN
+responden 404, igual que /metrics.
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+import database
+from singleflight import coalescer
+from customer.http_cache import response_cache
+from user.admission import admission
+from user.hashing import hash_executor
+from user.principal_cache import principal_cache
+from user.token_versions import token_versions
+
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "")
+
+internal_security = HTTPBearer(auto_error=False)
+
+def require_internal_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(internal_security)):
+    """Dependency de /internal/* y /metrics: 404 si están deshabilitados, 401 sin el token"""
+    if not INTERNAL_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), INTERNAL_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token interno inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(require_internal_token)],
+)
+
+@router.get("/hashing")
+def hashing_stats():
+    """Estado del pool de bcrypt: profundidad de cola, espera y rechazos"""
+    return hash_executor.stats()
+
+@router.get("/admission")
+def admission_stats():
+    """Peticiones admitidas y rechazadas (por IP, username o presupuesto global) en register/login"""
+    return admission.stats()
+
+@router.get("/auth-cache")
+def auth_cache_stats():
+    """Aciertos, fallos e invalidaciones del cache de usuarios autenticados"""
+    return principal_cache.stats()
+
+@router.get("/token-versions")
+def token_versions_stats():
+    """Mapa de token_version: cargas, refrescos en bloque y tokens revocados rechazados"""
+    return token_versions.stats()
+
+@router.get("/response-cache")
+def response_cache_stats():
+    """Aciertos del cache de respuestas de customers y proporción de 304"""
+    return response_cache.stats()
+
+@router.get("/singleflight")
+def singleflight_stats():
+    """Lecturas ejecutadas y peticiones que reutilizaron una lectura en curso"""
+    return coalescer.stats()
+
+@router.get("/pool")
+def pool_stats():
+    """Pool de conexiones: en uso, overflow y tiempo de espera por checkout"""
+    return {
+        "sync": database.get_pool_stats(database.engine),
+        "async": database.get_pool_stats(database._async_engine.sync_engine) if database._async_engine else None,
+        "replica": database.get_pool_stats(database._replica_engine) if database._replica_engine else None,
+        "async_replica": (
+            database.get_pool_stats(database._async_replica_engine.sync_engine)
+            if database._async_replica_engine else None
+        ),
+        "pgbouncer": database.is_pgbouncer_url(database.SQLALCHEMY_DATABASE_URL),
+    }
@@ -2,12 +2,27 @@
 Archivo principal para ejecutar la aplicación FastAPI
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+import database
+from database import DB_MODE
+import metrics
+from internal import require_internal_token
+import sql_recorder
+from user import auth
 from user.main import router as auth_router
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Con BCRYPT_ROUNDS=auto, calibrar bcrypt en su pool antes del primer login
+    auth.warm_up_pwd_context()
+    yield
+
 # Crear nueva instancia de FastAPI
-app = FastAPI(title="NextAPI", description="API para aplicación Next.js")
+app = FastAPI(title="NextAPI", description="API para aplicación Next.js", lifespan=lifespan)
 
 # Endpoint de prueba en la raíz
 @app.get("/")
@@ -36,15 +51,49 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+def with_async_routes(sync_router: APIRouter, async_router: APIRouter) -> APIRouter:
+    """
+    Router con la versión async de cada endpoint cuando existe.
+    Se conserva el orden del router sync para no alterar el matching de rutas.
+    """
+    async_routes = {(route.path, frozenset(route.methods)): route for route in async_router.routes}
+    router = APIRouter()
+    for route in sync_router.routes:
+        router.routes.append(async_routes.get((route.path, frozenset(route.methods)), route))
+    return router
+
+if DB_MODE == "async":
+    from user.main_async import router as async_auth_router
+    auth_router = with_async_routes(auth_router, async_auth_router)
+
+# Métricas por ruta y Server-Timing (se añade después de CORS para medir toda la petición)
+app.add_middleware(database.ReadYourWritesMiddleware)
+app.add_middleware(sql_recorder.SQLRecorderMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+def metrics_endpoint():
+    """Métricas en formato de texto de Prometheus (con INTERNAL_TOKEN, ver internal.py)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Incluir routers
 app.include_router(auth_router)
 
 # Importar routers para customers y autenticación
 from customer.main import router as customers_router
 
+if DB_MODE == "async":
+    from customer.main_async import router as async_customers_router
+    customers_router = with_async_routes(customers_router, async_customers_router)
+
 # Incluir routers
 app.include_router(customers_router)
 
+# Endpoints internos de diagnóstico
+from internal import router as internal_router
+
+app.include_router(internal_router)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,201 @@
+"""
+Métricas por ruta en formato Prometheus y header Server-Timing.
+
+MetricsMiddleware mide la latencia de cada petición por ruta (plantilla, no URL)
+y los eventos de cursor de SQLAlchemy acumulan el número de consultas y el tiempo
+en base de datos de la petición en curso. Todo se exporta en /metrics, que
+requiere INTERNAL_TOKEN (Authorization: Bearer) y responde 404 si no está
+configurado: el scraper de Prometheus debe enviar ese token.
+
+Estos son los únicos listeners de cursor de la app: otros módulos (sql_recorder)
+reciben cada sentencia con su duración vía add_statement_listener.
+"""
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Límites de los buckets de los histogramas, en segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTiming:
+    """Tiempo en base de datos y número de consultas de una petición"""
+
+    __slots__ = ("db_seconds", "queries")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+
+
+_current_request: ContextVar = ContextVar("request_timing", default=None)
+
+
+def current_request_timing():
+    return _current_request.get()
+
+
+# Funciones (statement, segundos) llamadas tras cada sentencia ejecutada
+_statement_listeners = []
+
+
+def add_statement_listener(listener):
+    """Recibir cada sentencia y su duración, medida por el mismo hook que las métricas"""
+    _statement_listeners.append(listener)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = _current_request.get()
+    if timing is None and not _statement_listeners:
+        return
+    start = getattr(context, "_metrics_start", None)
+    duration = time.perf_counter() - start if start is not None else 0.0
+    if timing is not None and start is not None:
+        timing.db_seconds += duration
+        timing.queries += 1
+    for listener in _statement_listeners:
+        listener(statement, duration)
+
+
+class Histogram:
+    """Histograma acumulativo con etiquetas, al estilo de prometheus_client"""
+
+    def __init__(self, name: str, help_text: str, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._series = {}  # etiquetas -> [conteos por bucket..., +Inf], suma
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value: float):
+        index = bisect.bisect_left(BUCKETS, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(BUCKETS) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(items):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f'{self.name}_bucket{{{base}{"," if base else ""}le="{le}"}} {cumulative}'
+            yield f"{self.name}_sum{{{base}}} {total}"
+            yield f"{self.name}_count{{{base}}} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta", ("method", "route", "status")
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds", "Tiempo en base de datos por petición", ("method", "route")
+)
+REQUEST_DB_QUERIES = Counter(
+    "http_request_db_queries_total", "Consultas SQL ejecutadas por ruta", ("method", "route")
+)
+
+REGISTRY = [REQUEST_LATENCY, REQUEST_DB_TIME, REQUEST_DB_QUERIES]
+
+
+def render() -> str:
+    """Todas las métricas en formato de texto de Prometheus"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def route_label(scope) -> str:
+    """Plantilla de la ruta (/customers/{customer_id}) para no crear una serie por URL"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latencia por ruta, tiempo en BD y header Server-Timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current_request.set(timing)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = timing.db_seconds * 1000
+                server_timing = f"app;dur={total_ms - db_ms:.1f}, db;dur={db_ms:.1f}"
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            elapsed = time.perf_counter() - start
+            method = scope["method"]
+            route = route_label(scope)
+            REQUEST_LATENCY.observe((method, route, str(status_code)), elapsed)
+            REQUEST_DB_TIME.observe((method, route), timing.db_seconds)
+            if timing.queries:
+                REQUEST_DB_QUERIES.inc((method, route), timing.queries)
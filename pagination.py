@@ -0,0 +1,98 @@
+"""
+Paginación por cursor (keyset) compartida por los routers de customers y autenticación.
+
+En lugar de OFFSET, cada página busca a partir de la última fila vista usando
+(columna_de_orden, id) como clave, de modo que el costo de la página 10.000 es el
+mismo que el de la página 1 siempre que exista un índice sobre esa clave.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+# Header en el que se devuelve el cursor de la siguiente página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Rango de las columnas Integer (int4) de Postgres
+INT4_MIN, INT4_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def encode_cursor(sort: str, value, row_id: int) -> str:
+    """Codificar la posición de la última fila como un cursor opaco"""
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    payload = json.dumps([sort, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def is_value_of(value, value_type) -> bool:
+    """True si `value` se puede comparar con una columna cuyo tipo Python es `value_type`"""
+    if value_type is int:
+        return isinstance(value, int) and not isinstance(value, bool) and INT4_MIN <= value <= INT4_MAX
+    return isinstance(value, value_type)
+
+
+def decode_cursor(cursor: str, sort: str, value_type: Optional[type] = None):
+    """
+    Decodificar un cursor opaco.
+    Devuelve (valor, id) o None si el cursor está vacío (primera página).
+    Con `value_type` (tipo Python de la columna de orden) se rechaza un valor de
+    otro tipo, que de lo contrario fallaría en Postgres con un 500.
+    """
+    if not cursor:
+        return None
+
+    invalid_cursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cursor inválido",
+    )
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise invalid_cursor
+
+    # Un cursor solo es válido para el mismo orden con el que se generó
+    if cursor_sort != sort or not is_value_of(row_id, int):
+        raise invalid_cursor
+    if value_type is not None and not is_value_of(value, value_type):
+        raise invalid_cursor
+    return value, row_id
+
+
+def order_columns(sort_column, id_column, descending: bool = False):
+    """ORDER BY determinista: columna de orden y el id como desempate"""
+    columns = [id_column] if sort_column is id_column else [sort_column, id_column]
+    if descending:
+        return [column.desc() for column in columns]
+    return columns
+
+
+def apply_keyset(query, sort: str, sort_column, id_column, cursor: str, limit: int, descending: bool = False):
+    """
+    Aplicar el filtro de búsqueda (seek), el ORDER BY y el LIMIT a una consulta.
+    El id se usa como desempate cuando se ordena por otra columna.
+    """
+    position = decode_cursor(cursor, sort, sort_column.type.python_type)
+
+    if position is not None:
+        if sort_column is id_column:
+            key, seek = id_column, position[1]
+        else:
+            key, seek = tuple_(sort_column, id_column), tuple_(*position)
+        query = query.filter(key < seek if descending else key > seek)
+    return query.order_by(*order_columns(sort_column, id_column, descending)).limit(limit)
+
+
+def next_cursor(rows, sort: str, sort_attr: str, id_attr: str, limit: int) -> Optional[str]:
+    """Cursor de la siguiente página, o None si esta es la última"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(sort, getattr(last, sort_attr), getattr(last, id_attr))
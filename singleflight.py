@@ -0,0 +1,149 @@
+"""
+Coalescencia de lecturas concurrentes idénticas (single-flight).
+
+Mientras una petición ejecuta la lectura de una clave (consulta y serialización),
+las que llegan con la misma clave no abren otra conexión: esperan y reciben el
+mismo resultado, o la misma excepción (p. ej. el 404). No guarda nada al
+terminar, así que funciona igual con o sin cache de respuestas.
+
+El resultado se comparte entre peticiones: debe ser inmutable (bytes, una
+CachedResponse) y cada petición construye su propia Response a partir de él.
+Los handlers sync usan do() (threads del threadpool) y los async do_async().
+
+Las escrituras llaman a invalidate(): las lecturas en curso dejan de aceptar
+seguidores, de modo que una petición que llega después de una escritura
+confirmada nunca recibe un resultado leído antes de ella.
+"""
+import asyncio
+import os
+import threading
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class _LeaderCancelled(Exception):
+    """La petición que ejecutaba la lectura se canceló: los seguidores reintentan"""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Una ejecución en curso por clave; los demás llamadores esperan su resultado"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executions = 0
+        self._coalesced = 0
+        self._invalidations = 0
+
+    def invalidate(self):
+        """Desasociar las lecturas en curso: las siguientes peticiones empiezan una nueva"""
+        with self._lock:
+            self._calls.clear()
+            self._futures.clear()
+            self._invalidations += 1
+
+    def do(self, key, fn):
+        """Ejecutar fn() o esperar a la ejecución en curso para la misma clave"""
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executions += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn):
+        """do() para handlers async: fn es una función que devuelve un awaitable"""
+        if not self.enabled:
+            return await fn()
+        while True:
+            with self._lock:
+                future = self._futures.get(key)
+                leader = future is None
+                if leader:
+                    future = self._futures[key] = asyncio.get_running_loop().create_future()
+                    self._executions += 1
+                else:
+                    self._coalesced += 1
+
+            if leader:
+                return await self._lead(key, future, fn)
+            try:
+                # shield: si se cancela un seguidor no se cancela el resultado compartido
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # Otro seguidor (o este) toma el relevo con una lectura nueva
+                continue
+
+    async def _lead(self, key, future, fn):
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # La cancelación es de esta petición, no de los seguidores
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Marcar la excepción como leída aunque no haya seguidores esperando
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self._executions + self._coalesced
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._calls) + len(self._futures),
+                "calls": calls,
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "invalidations": self._invalidations,
+                "coalescing_ratio": round(self._coalesced / calls, 4) if calls else 0.0,
+            }
+
+
+coalescer = SingleFlight(SINGLEFLIGHT_ENABLED)
+
+
+def flight_key(key, db):
+    """Clave de coalescencia: las lecturas de la réplica no se comparten con las de la principal"""
+    return (key, bool(db.info.get("replica")))
@@ -0,0 +1,140 @@
+"""
+Registro de SQL por petición: log de consultas lentas y detector de N+1.
+
+Cada petición HTTP se ejecuta con un QueryRecorder activo (SQLRecorderMiddleware)
+que guarda las sentencias que emite cualquier Session de database.SessionLocal.
+Al terminar la petición se registran en el log las sentencias que superan
+SLOW_QUERY_MS y las formas de sentencia que se repiten N_PLUS_ONE_THRESHOLD
+veces o más (patrón N+1).
+
+Para tests, assert_max_queries(n) falla si el bloque ejecuta más de n sentencias.
+"""
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import metrics
+
+logger = logging.getLogger("nextapi.sql")
+
+SQL_RECORDER_ENABLED = os.getenv("SQL_RECORDER_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+_WHITESPACE = re.compile(r"\s+")
+# Listas de parámetros (IN expandido, VALUES multi-fila) se reducen a un solo "?"
+_PARAMETERS = re.compile(r"(%\(\w+\)s|\$\d+|\?)(\s*,\s*(%\(\w+\)s|\$\d+|\?))*")
+
+
+def statement_shape(statement: str) -> str:
+    """Forma normalizada de una sentencia para agrupar repeticiones"""
+    return _PARAMETERS.sub("?", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryRecorder:
+    """Sentencias ejecutadas (forma y duración en segundos) dentro de un alcance"""
+
+    def __init__(self):
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float):
+        with self._lock:
+            self.statements.append((statement, duration))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def slow(self, threshold_ms: float = None):
+        if threshold_ms is None:
+            threshold_ms = SLOW_QUERY_MS
+        return [(s, d) for s, d in self.statements if d * 1000 >= threshold_ms]
+
+    def repeated_shapes(self, threshold: int = None):
+        if threshold is None:
+            threshold = N_PLUS_ONE_THRESHOLD
+        shapes = Counter(statement_shape(s) for s, _ in self.statements)
+        return {shape: n for shape, n in shapes.items() if n >= threshold}
+
+
+_current_recorder: ContextVar = ContextVar("sql_recorder", default=None)
+# Capturas globales de assert_max_queries (ven sentencias de cualquier thread)
+_captures = []
+_captures_lock = threading.Lock()
+
+
+def _record_statement(statement: str, duration: float):
+    # Duración medida por los listeners de cursor de metrics (no se registran otros)
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.record(statement, duration)
+    for capture in list(_captures):
+        capture.record(statement, duration)
+
+
+metrics.add_statement_listener(_record_statement)
+
+
+@contextmanager
+def recording():
+    """Activar un QueryRecorder para el contexto actual (petición, script o tarea)"""
+    recorder = QueryRecorder()
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+def report(recorder: QueryRecorder, route: str):
+    """Registrar en el log las consultas lentas y las formas repetidas de una petición"""
+    for statement, duration in recorder.slow():
+        logger.warning("Consulta lenta (%.1f ms) en %s: %s", duration * 1000, route, statement_shape(statement))
+    for shape, count in recorder.repeated_shapes().items():
+        logger.warning("Posible N+1 en %s: %d ejecuciones de %s", route, count, shape)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Helper de tests: falla si el bloque ejecuta más de `max_queries` sentencias.
+    Cuenta las sentencias de todos los threads (también las del TestClient).
+
+        with assert_max_queries(1):
+            client.get("/customers/1")
+    """
+    capture = QueryRecorder()
+    with _captures_lock:
+        _captures.append(capture)
+    try:
+        yield capture
+    finally:
+        with _captures_lock:
+            _captures.remove(capture)
+    if capture.count > max_queries:
+        executed = "\n".join(f"  {statement_shape(s)}" for s, _ in capture.statements)
+        raise AssertionError(f"Se esperaban como máximo {max_queries} consultas, se ejecutaron {capture.count}:\n{executed}")
+
+
+class SQLRecorderMiddleware:
+    """Middleware ASGI: un QueryRecorder por petición y reporte al terminar"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_RECORDER_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        with recording() as recorder:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if recorder.statements:
+                    report(recorder, f"{scope['method']} {metrics.route_label(scope)}")
@@ -0,0 +1,63 @@
+"""
+Fixtures de los tests: la app contra el Postgres de DATABASE_URL.
+
+Los tests escriben en la base de datos (crean y borran sus propias filas), así
+que necesitan una base de desarrollo o la de benchmarks/local_postgres.py, p. ej.:
+    DATABASE_URL=postgresql://postgres@localhost:5433/nextapi?sslmode=disable DB_SSLMODE=disable \
+        python -m pytest tests
+Sin DATABASE_URL se omiten.
+"""
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los tests miden las consultas del handler: sin token buckets ni calibración de bcrypt
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "10")
+os.environ.setdefault("DB_MODE", "sync")
+
+
+@pytest.fixture(scope="session")
+def client():
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL no configurada")
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    """Session sobre la base de datos de DATABASE_URL (sin pasar por la app)"""
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL no configurada")
+    import database
+
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def customer(client):
+    """Customer creado para el test y eliminado al terminar"""
+    response = client.post("/customers/", json={"first_name": "Test", "last_name": "Cliente", "phone": "555-0100"})
+    assert response.status_code == 200, response.text
+    created = response.json()
+    yield created
+    client.delete(f"/customers/{created['customer_id']}")
+
+
+@pytest.fixture
+def unique_name():
+    return f"test_{uuid.uuid4().hex[:12]}"
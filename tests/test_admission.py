@@ -0,0 +1,100 @@
+"""
+Token buckets de admisión: recarga y consumo todo o nada.
+"""
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from user import admission
+from user.admission import AdmissionController, MemoryBucketStore, SQLiteBucketStore, refill, take_all
+
+
+def test_refill_adds_rate_per_second_up_to_burst():
+    assert refill(0.0, 100.0, 102.0, rate=0.5, burst=10) == 1.0
+    assert refill(9.5, 100.0, 110.0, rate=1, burst=10) == 10
+    # Un reloj que retrocede no quita tokens
+    assert refill(3.0, 100.0, 99.0, rate=1, burst=10) == 3.0
+
+
+def test_take_all_debits_every_bucket_when_all_have_a_token():
+    buckets = [("ip:1", 1, 10), ("global:", 4, 8)]
+    tokens, waits = take_all([(5.0, 100.0), None], buckets, now=100.0)
+    assert tokens == [4.0, 7.0]
+    assert waits == [0.0, 0.0]
+
+
+def test_take_all_debits_nothing_when_one_bucket_is_empty():
+    buckets = [("ip:1", 1, 10), ("username:ana|1", 0.2, 5), ("global:", 4, 8)]
+    tokens, waits = take_all([(5.0, 100.0), (0.5, 100.0), (8.0, 100.0)], buckets, now=100.0)
+    assert tokens == [5.0, 0.5, 8.0]
+    assert waits[0] == 0.0 and waits[2] == 0.0
+    # Falta medio token a 0.2 tokens/s
+    assert waits[1] == pytest.approx(2.5)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def controller(request, tmp_path):
+    store = MemoryBucketStore(100) if request.param == "memory" else SQLiteBucketStore(str(tmp_path / "admission.db"))
+    controller = AdmissionController(store)
+    controller.limits = {"ip": (0.001, 3), "username": (0.001, 1), "global": (0.001, 100)}
+    return controller
+
+
+def test_rejected_request_does_not_drain_other_buckets(controller):
+    controller.check("10.0.0.1", "ana")
+    for _ in range(3):
+        with pytest.raises(HTTPException) as error:
+            controller.check("10.0.0.1", "ana")
+        assert error.value.status_code == 429
+        assert int(error.value.headers["Retry-After"]) >= 1
+    # Los intentos rechazados sobre "ana" no consumieron del bucket de la IP
+    controller.check("10.0.0.1", "luis")
+    controller.check("10.0.0.1", "eva")
+    assert controller.stats()["rejected"] == 3
+
+
+def test_username_bucket_is_per_ip(controller):
+    controller.check("10.0.0.1", "ana")
+    with pytest.raises(HTTPException):
+        controller.check("10.0.0.1", "ana")
+    controller.check("10.0.0.2", "ana")
+
+
+def test_sqlite_lock_timeout_is_503(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / "admission.db"))
+    controller = AdmissionController(store)
+    store._connection()
+    holder = sqlite3.connect(store.path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(HTTPException) as error:
+            controller.check("10.0.0.1", "ana")
+        assert error.value.status_code == 503
+    finally:
+        holder.execute("ROLLBACK")
+
+
+def test_admit_runs_blocking_store_off_the_event_loop(tmp_path, monkeypatch):
+    store = SQLiteBucketStore(str(tmp_path / "admission.db"))
+    monkeypatch.setattr(admission, "admission", AdmissionController(store))
+    threads = []
+    original_take = store.take
+
+    def take(buckets, now):
+        threads.append(threading.current_thread())
+        return original_take(buckets, now)
+
+    monkeypatch.setattr(store, "take", take)
+
+    class FakeRequest:
+        headers = {}
+        client = type("Client", (), {"host": "10.0.0.1"})()
+
+        async def json(self):
+            return {"username": "Ana"}
+
+    asyncio.run(admission.admit(FakeRequest()))
+    assert threads and threads[0] is not threading.main_thread()
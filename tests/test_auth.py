@@ -0,0 +1,91 @@
+"""
+Revocación de tokens: un cambio hecho por otra instancia invalida los tokens
+cacheados en esta en cuanto token_versions se refresca, y una réplica atrasada
+no revoca a un usuario recién registrado. El rehash del login nunca baja el
+costo de bcrypt.
+"""
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import delete, select, update
+
+import database
+from user import auth, models
+from user.token_versions import token_versions
+
+
+def test_cached_principal_is_revoked_after_refresh(client, unique_name):
+    payload = {"username": unique_name, "email": f"{unique_name}@example.com", "password": "secreto123"}
+    assert client.post("/auth/register", json=payload).status_code == 201
+    token = client.post("/auth/login", json={"username": unique_name, "password": "secreto123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        # Llena principal_cache y token_versions
+        assert client.get("/auth/me", headers=headers).status_code == 200
+        assert client.get("/auth/me", headers=headers).status_code == 200
+
+        # change_password en otra instancia: solo cambia la fila
+        with database.SessionLocal() as db:
+            db.execute(
+                update(models.User)
+                .where(models.User.username == unique_name)
+                .values(token_version=models.User.token_version + 1)
+            )
+            db.commit()
+        token_versions._refreshed_at = 0
+
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token revocado"
+    finally:
+        with database.SessionLocal() as db:
+            db.execute(delete(models.User).where(models.User.username == unique_name))
+            db.commit()
+
+
+def test_lagging_replica_does_not_revoke_new_user(client, unique_name):
+    # Réplica atrasada: una transacción REPEATABLE READ cuya foto es anterior al registro
+    with database.SessionLocal(info={"replica": True}) as replica:
+        replica.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        replica.execute(select(1))
+
+        payload = {"username": unique_name, "email": f"{unique_name}@example.com", "password": "secreto123"}
+        assert client.post("/auth/register", json=payload).status_code == 201
+        login = client.post("/auth/login", json={"username": unique_name, "password": "secreto123"})
+        token = login.json()["access_token"]
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        try:
+            # El principal se cachea desde la principal; la lectura siguiente usa la réplica
+            with database.SessionLocal() as primary:
+                user = auth.load_current_user(primary, credentials)
+            assert auth.load_current_user(replica, credentials).id == user.id
+            assert token_versions.is_current(user.id, user.token_version)
+            assert client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+        finally:
+            replica.rollback()
+            with database.SessionLocal() as db:
+                db.execute(delete(models.User).where(models.User.username == unique_name))
+                db.commit()
+
+
+def bcrypt_context(rounds: int):
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def test_needs_rehash_only_raises_cost(monkeypatch):
+    monkeypatch.setattr(auth, "_pwd_context", bcrypt_context(6))
+    cheaper = bcrypt_context(4).hash("secreto123")
+    same = bcrypt_context(6).hash("secreto123")
+    stronger = bcrypt_context(8).hash("secreto123")
+
+    assert auth.needs_rehash(cheaper)
+    assert not auth.needs_rehash(same)
+    # Otra instancia calibró más alto: no se baja el costo
+    assert not auth.needs_rehash(stronger)
+
+
+def test_needs_rehash_upgrades_legacy_ident(monkeypatch):
+    monkeypatch.setattr(auth, "_pwd_context", bcrypt_context(6))
+    legacy = "$2a$" + bcrypt_context(8).hash("secreto123")[4:]
+
+    assert auth.needs_rehash(legacy)
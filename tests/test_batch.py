@@ -0,0 +1,23 @@
+"""
+GET /customers/batch: validación de la lista de ids.
+"""
+import pytest
+from fastapi import HTTPException
+
+from customer import batch
+
+
+def test_parse_ids_keeps_input_order_without_duplicates():
+    assert batch.parse_ids("3, 1,3,,2") == [3, 1, 2]
+
+
+@pytest.mark.parametrize("ids", ["", "1,a", "0", "-5", "1,2147483648", "99999999999"])
+def test_parse_ids_rejects_invalid_ids(ids):
+    with pytest.raises(HTTPException) as error:
+        batch.parse_ids(ids)
+    assert error.value.status_code == 400
+
+
+def test_batch_with_out_of_range_id_is_400(client):
+    response = client.get("/customers/batch", params={"ids": "1,99999999999"})
+    assert response.status_code == 400
@@ -0,0 +1,46 @@
+"""
+Operaciones masivas: los elementos inválidos se reportan sin abortar el lote.
+"""
+
+
+def test_bulk_create_reports_overlong_fields(client):
+    customers = [
+        {"first_name": "Válido", "last_name": "Uno"},
+        {"first_name": "x" * 101, "last_name": "Largo"},
+        {"first_name": "Válido", "last_name": "Dos", "phone": "5" * 21},
+        {"first_name": "Válido", "last_name": "Tres"},
+    ]
+    response = client.post("/customers/bulk", json=customers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    try:
+        assert [result["status"] for result in body["results"]] == ["created", "invalid", "invalid", "created"]
+        assert body["results"][1]["error"] == "first_name: máximo 100 caracteres"
+        assert body["results"][2]["error"] == "phone: máximo 20 caracteres"
+        assert (body["succeeded"], body["failed"]) == (2, 2)
+    finally:
+        created = [result["customer_id"] for result in body["results"] if result["status"] == "created"]
+        client.request("DELETE", "/customers/bulk", json=created)
+
+
+def test_bulk_update_reports_overlong_fields(client, customer):
+    updates = [
+        {"customer_id": customer["customer_id"], "last_name": "y" * 101},
+        {"customer_id": 0, "last_name": "Nadie"},
+    ]
+    response = client.patch("/customers/bulk", json=updates)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["invalid", "not_found"]
+    assert client.get(f"/customers/{customer['customer_id']}").json()["last_name"] == customer["last_name"]
+
+
+def test_bulk_update_reports_null_required_fields(client, customer):
+    response = client.patch("/customers/bulk", json=[{"customer_id": customer["customer_id"], "first_name": None}])
+    assert response.status_code == 200, response.text
+    result = response.json()["results"][0]
+    assert (result["status"], result["error"]) == ("invalid", "first_name: no puede ser null")
+
+    # phone admite NULL: se aplica
+    response = client.patch("/customers/bulk", json=[{"customer_id": customer["customer_id"], "phone": None}])
+    assert response.json()["results"][0]["status"] == "updated"
@@ -0,0 +1,21 @@
+"""
+Cola efectiva del pool de bcrypt según DB_MODE y HASH_MAX_PARKED_THREADS.
+"""
+from user.hashing import HASH_MAX_PARKED_THREADS, queue_limit
+
+
+def test_sync_queue_fits_parked_threads():
+    assert queue_limit(2, 32, mode="sync") == HASH_MAX_PARKED_THREADS - 2
+
+
+def test_sync_queue_keeps_one_slot_with_many_workers():
+    assert queue_limit(HASH_MAX_PARKED_THREADS, 32, mode="sync") == 1
+    assert queue_limit(HASH_MAX_PARKED_THREADS + 6, 32, mode="sync") == 1
+
+
+def test_explicit_zero_queue_is_respected():
+    assert queue_limit(HASH_MAX_PARKED_THREADS + 6, 0, mode="sync") == 0
+
+
+def test_async_queue_is_not_limited():
+    assert queue_limit(HASH_MAX_PARKED_THREADS + 6, 32, mode="async") == 32
@@ -0,0 +1,112 @@
+"""
+ETags y cache de respuestas de customers: cálculo del ETag, invalidación por
+generación y respuestas 304.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from customer import http_cache
+from customer.http_cache import CachedResponse, ResponseCache
+
+
+def row(customer_id, created_at, update=None):
+    return SimpleNamespace(_mapping={"customer_id": customer_id, "created_at": created_at, "update": update})
+
+
+def request(method="GET", if_none_match=None, query=b""):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": method, "path": "/customers/", "query_string": query, "headers": headers})
+
+
+CREATED = datetime(2024, 1, 1, 10, 0)
+UPDATED = datetime(2024, 2, 1, 10, 0)
+
+
+def test_etag_depends_on_row_versions_and_request_key():
+    etag = http_cache.make_etag([row(1, CREATED)], ("customer", 1))
+    assert etag.startswith('"') and etag.endswith('"')
+    assert http_cache.make_etag([row(1, CREATED)], ("customer", 1)) == etag
+    assert http_cache.make_etag([row(1, CREATED, UPDATED)], ("customer", 1)) != etag
+    assert http_cache.make_etag([row(1, CREATED)], ("customer", 1, ("first_name",))) != etag
+    assert http_cache.make_etag([row(2, CREATED)], ("customer", 1)) != etag
+
+
+def test_etag_matches_if_none_match_lists_and_weak_validators():
+    assert http_cache.etag_matches('"a", "b"', '"b"')
+    assert http_cache.etag_matches('W/"b"', '"b"')
+    assert http_cache.etag_matches("*", '"b"')
+    assert not http_cache.etag_matches('"a"', '"b"')
+
+
+def test_list_key_ignores_parameter_order():
+    assert http_cache.list_key(request(query=b"limit=5&skip=0")) == http_cache.list_key(request(query=b"skip=0&limit=5"))
+
+
+def test_put_is_dropped_after_an_invalidation():
+    cache = ResponseCache(ttl=60, max_size=10)
+    generation = cache.generation
+    cache.invalidate_customer(1)
+    cache.put(("customer", 1), CachedResponse(b"viejo", '"v"'), generation, customer_id=1)
+    assert cache.get(("customer", 1)) is None
+
+    cache.put(("customer", 1), CachedResponse(b"nuevo", '"n"'), cache.generation, customer_id=1)
+    assert cache.get(("customer", 1)).body == b"nuevo"
+
+
+def test_invalidations_remove_the_affected_entries():
+    cache = ResponseCache(ttl=60, max_size=10)
+    cache.put(("customer", 1), CachedResponse(b"1", '"1"'), cache.generation, customer_id=1)
+    cache.put(("customer", 2), CachedResponse(b"2", '"2"'), cache.generation, customer_id=2)
+    cache.put(("list",), CachedResponse(b"[]", '"l"'), cache.generation)
+
+    cache.invalidate_lists()
+    assert cache.get(("list",)) is None
+    assert cache.get(("customer", 1)) is not None
+
+    cache.invalidate_customer(1)
+    assert cache.get(("customer", 1)) is None
+    assert cache.get(("customer", 2)) is not None
+
+    cache.clear()
+    assert cache.get(("customer", 2)) is None
+
+
+def test_entries_expire_and_size_is_bounded():
+    cache = ResponseCache(ttl=60, max_size=2)
+    for customer_id in (1, 2, 3):
+        cache.put(("customer", customer_id), CachedResponse(b"", '"e"'), cache.generation, customer_id=customer_id)
+    assert cache.get(("customer", 1)) is None
+    assert cache.stats()["evictions"] == 1
+
+    expired = ResponseCache(ttl=0.000001, max_size=2)
+    expired.put(("customer", 1), CachedResponse(b"", '"e"'), expired.generation, customer_id=1)
+    assert expired.get(("customer", 1)) is None
+
+
+def test_respond_returns_304_when_etag_matches():
+    cached = CachedResponse(b'{"customer_id":1}', '"abc"', {"X-Extra": "1"})
+
+    response = http_cache.respond(request(if_none_match='"abc"'), cached)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = http_cache.respond(request(if_none_match='"otro"'), cached)
+    assert response.status_code == 200
+    assert response.body == cached.body
+    assert response.headers["x-extra"] == "1"
+
+
+def test_customer_etag_changes_after_update(client, customer):
+    url = f"/customers/{customer['customer_id']}"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(url, json={"first_name": "Cambiado"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Cambiado"
+    assert response.headers["etag"] != etag
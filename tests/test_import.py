@@ -0,0 +1,35 @@
+"""
+POST /customers/import: los registros que el lector CSV o Postgres rechazarían
+van al reporte sin abortar la carga.
+"""
+from sqlalchemy import text
+
+import database
+from customer import importer
+
+
+def delete_imported(last_name: str):
+    with database.SessionLocal() as db:
+        db.execute(text("DELETE FROM sales.customer WHERE last_name = :last_name"), {"last_name": last_name})
+        db.commit()
+
+
+def test_import_reports_csv_errors_per_row(client, unique_name):
+    oversized = "x" * (importer.IMPORT_MAX_FIELD_CHARS + 1)
+    body = (
+        "first_name,last_name\n"
+        f"Uno,{unique_name}\n"
+        f'"{oversized}",{unique_name}\n'
+        f"Nul\x00,{unique_name}\n"
+        f"Dos,{unique_name}\n"
+    )
+    try:
+        response = client.post("/customers/import", content=body.encode())
+        assert response.status_code == 200, response.text
+        report = response.json()
+        assert (report["accepted"], report["rejected"]) == (2, 2)
+        assert report["errors"][0]["line"] == 3
+        assert report["errors"][0]["error"].startswith("CSV inválido")
+        assert report["errors"][1] == {"line": 4, "error": "first_name: contiene el carácter NUL"}
+    finally:
+        delete_imported(unique_name)
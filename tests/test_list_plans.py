@@ -0,0 +1,100 @@
+"""
+Planes de GET /customers: cada combinación de filtros y orden, con y sin cursor,
+lee sales.customer con un índice (nunca Seq Scan) y, donde create_indexes.sql
+define un índice para esa combinación, usa ese índice.
+
+Se evalúa con enable_seqscan=off para que el resultado no dependa del tamaño de
+la tabla de pruebas: si el plan aún contiene un Seq Scan, ningún índice sirve.
+Requiere los índices de create_indexes.sql.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import pagination
+from customer.main import customer_filters, list_statement
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+NOW = datetime(2025, 1, 15, 12, 0, 0)
+FILTERS = {
+    "sin filtros": {},
+    "rango created_at": {"created_from": NOW - timedelta(days=1), "created_to": NOW},
+    "prefijo last_name": {"last_name_prefix": "Apellido12"},
+    "has_phone": {"has_phone": True},
+    "sin teléfono": {"has_phone": False},
+    "has_phone + rango": {"has_phone": True, "created_from": NOW - timedelta(days=1)},
+    "sin teléfono + rango": {"has_phone": False, "created_from": NOW - timedelta(days=1)},
+    "prefijo + has_phone": {"last_name_prefix": "Apellido12", "has_phone": True},
+}
+SORTS = ["customer_id", "-customer_id", "created_at", "-created_at", "last_name", "-last_name"]
+# Valor de cursor a mitad de la tabla para verificar también el seek del keyset
+CURSOR_VALUES = {"customer_id": 1, "created_at": NOW - timedelta(hours=12), "last_name": "Apellido12"}
+
+
+def expected_indexes(filters: dict, sort: str) -> set:
+    """Índices de create_indexes.sql que pueden servir la combinación de filtros y orden"""
+    column = sort.lstrip("-")
+    has_phone = filters.get("has_phone")
+    created_at_index = {
+        True: "customer_with_phone_created_at_id_idx",
+        False: "customer_without_phone_created_at_id_idx",
+    }.get(has_phone, "customer_created_at_id_idx")
+    last_name_indexes = {"customer_last_name_id_idx", "customer_last_name_pattern_idx"}
+    if column == "created_at":
+        return {created_at_index}
+
+    allowed = {"customer_pkey"} if column == "customer_id" else set(last_name_indexes)
+    # Un filtro selectivo se puede resolver con su índice y ordenar el resultado aparte
+    if has_phone is False or "created_from" in filters or "created_to" in filters:
+        allowed.add(created_at_index)
+    if "last_name_prefix" in filters:
+        allowed |= last_name_indexes
+    return allowed
+
+
+def plan_nodes(plan):
+    """(tipo de nodo, índice, relación) de todos los nodos de un plan de EXPLAIN (FORMAT JSON)"""
+    nodes = [(plan["Node Type"], plan.get("Index Name"), plan.get("Relation Name"))]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(db, statement):
+    compiled = statement.compile(db.get_bind())
+    row = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    if isinstance(row, str):
+        row = json.loads(row)
+    return row[0]["Plan"]
+
+
+@pytest.fixture
+def plan_db(db):
+    indexes = {
+        name for name, in db.connection().exec_driver_sql(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = 'sales' AND tablename = 'customer'"
+        )
+    }
+    required = set().union(*(expected_indexes(filters, sort) for filters in FILTERS.values() for sort in SORTS))
+    if required - indexes:
+        pytest.skip(f"Faltan índices de create_indexes.sql: {', '.join(sorted(required - indexes))}")
+    db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+    return db
+
+
+@pytest.mark.parametrize("with_cursor", [False, True], ids=["offset", "cursor"])
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("label", list(FILTERS))
+def test_list_uses_index(plan_db, label, sort, with_cursor):
+    filters = FILTERS[label]
+    cursor = pagination.encode_cursor(sort, CURSOR_VALUES[sort.lstrip("-")], 1) if with_cursor else None
+    statement = list_statement(customer_filters(**filters), sort, cursor, 0, 100)
+
+    nodes = [(node, index) for node, index, relation in plan_nodes(explain(plan_db, statement))
+             if relation == "customer" or node == "Bitmap Index Scan"]
+    assert "Seq Scan" not in [node for node, _ in nodes], nodes
+    used = {index for node, index in nodes if node in INDEX_NODES}
+    assert used, nodes
+    assert used <= expected_indexes(filters, sort), nodes
@@ -0,0 +1,48 @@
+"""
+Cursores de paginación: ida y vuelta y rechazo de cursores manipulados.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import pagination
+
+
+def forged_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, value, value_type", [
+    ("customer_id", 42, int),
+    ("last_name", "Pérez", str),
+    ("-created_at", datetime(2024, 5, 1, 12, 30, 15, 123456), datetime),
+    ("created_at", datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), datetime),
+])
+def test_round_trip(sort, value, value_type):
+    cursor = pagination.encode_cursor(sort, value, 7)
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor, sort, value_type) == (value, 7)
+
+
+def test_empty_cursor_is_first_page():
+    assert pagination.decode_cursor("", "customer_id") is None
+
+
+@pytest.mark.parametrize("cursor, sort, value_type", [
+    ("no-es-base64!", "customer_id", int),
+    (forged_cursor(["last_name", "A", 1]), "-last_name", str),
+    (forged_cursor(["customer_id", 1, "1"]), "customer_id", int),
+    (forged_cursor(["customer_id", 1, True]), "customer_id", int),
+    (forged_cursor(["customer_id", 1, 2 ** 31]), "customer_id", int),
+    (forged_cursor(["created_at", "notadate", 1]), "created_at", datetime),
+    (forged_cursor(["created_at", {"dt": "notadate"}, 1]), "created_at", datetime),
+    (forged_cursor(["last_name", 123, 1]), "last_name", str),
+    (forged_cursor(["last_name", None, 1]), "last_name", str),
+])
+def test_malformed_cursor_is_400(cursor, sort, value_type):
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor(cursor, sort, value_type)
+    assert error.value.status_code == 400
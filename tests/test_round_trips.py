@@ -0,0 +1,49 @@
+"""
+Idas y vueltas a Postgres de las escrituras: una sola sentencia por petición
+(INSERT/UPDATE/DELETE ... RETURNING), sin SELECT previos ni refresh posteriores.
+"""
+from sql_recorder import assert_max_queries
+
+
+def test_create_customer(client):
+    with assert_max_queries(1):
+        response = client.post("/customers/", json={"first_name": "Ana", "last_name": "Pérez"})
+    assert response.status_code == 200, response.text
+    client.delete(f"/customers/{response.json()['customer_id']}")
+
+
+def test_update_customer(client, customer):
+    with assert_max_queries(1):
+        response = client.put(f"/customers/{customer['customer_id']}", json={"first_name": "Actualizado"})
+    assert response.status_code == 200, response.text
+    assert response.json()["first_name"] == "Actualizado"
+
+
+def test_update_missing_customer(client):
+    with assert_max_queries(1):
+        response = client.put("/customers/0", json={"first_name": "Nadie"})
+    assert response.status_code == 404
+
+
+def test_delete_customer(client, customer):
+    with assert_max_queries(1):
+        response = client.delete(f"/customers/{customer['customer_id']}")
+    assert response.status_code == 200, response.text
+    assert client.get(f"/customers/{customer['customer_id']}").status_code == 404
+
+
+def test_register_user(client, unique_name):
+    payload = {"username": unique_name, "email": f"{unique_name}@example.com", "password": "secreto123"}
+    with assert_max_queries(1):
+        response = client.post("/auth/register", json=payload)
+    assert response.status_code == 201, response.text
+    assert response.json()["username"] == unique_name
+
+    # El duplicado lo detecta la restricción UNIQUE del mismo INSERT
+    with assert_max_queries(1):
+        response = client.post("/auth/register", json=payload)
+    assert response.status_code == 400
+
+    login = client.post("/auth/login", json={"username": unique_name, "password": "secreto123"})
+    token = login.json()["access_token"]
+    client.delete("/auth/me", headers={"Authorization": f"Bearer {token}"})
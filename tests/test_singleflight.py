@@ -0,0 +1,160 @@
+"""
+Coalescencia de lecturas (single-flight): resultado y excepción compartidos,
+invalidación de lecturas en curso y cancelación de la petición líder.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Lanzar `callers` threads con la misma clave; el primero entra antes que el resto"""
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(index):
+        try:
+            results[index] = flight.do(key, fn)
+        except Exception as error:
+            errors[index] = error
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+    threads[0].start()
+    time.sleep(0.05)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    def fetch():
+        executions.append(1)
+        time.sleep(0.2)
+        return b"cuerpo"
+
+    results, errors = run_concurrently(flight, "k", fetch, 5)
+    assert results == [b"cuerpo"] * 5
+    assert errors == [None] * 5
+    assert len(executions) == 1
+    stats = flight.stats()
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_followers_receive_the_leader_exception():
+    flight = SingleFlight()
+
+    def fetch():
+        time.sleep(0.2)
+        raise LookupError("no existe")
+
+    results, errors = run_concurrently(flight, "k", fetch, 3)
+    assert all(isinstance(error, LookupError) for error in errors)
+    assert flight.stats()["executions"] == 1
+
+
+def test_invalidate_detaches_in_flight_read():
+    flight = SingleFlight()
+    state = {"version": 1}
+    started = threading.Event()
+
+    def fetch():
+        version = state["version"]
+        started.set()
+        time.sleep(0.2)
+        return version
+
+    before = []
+    thread = threading.Thread(target=lambda: before.append(flight.do("k", fetch)))
+    thread.start()
+    started.wait()
+
+    # Escritura confirmada mientras la lectura anterior sigue en curso
+    state["version"] = 2
+    flight.invalidate()
+    after = flight.do("k", fetch)
+    thread.join()
+
+    assert before == [1]
+    assert after == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_disabled_flight_always_executes():
+    flight = SingleFlight(enabled=False)
+    executions = []
+    results, _ = run_concurrently(flight, "k", lambda: executions.append(1) or time.sleep(0.05), 3)
+    assert len(executions) == 3
+
+
+def test_async_followers_share_result_and_exception():
+    flight = SingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise LookupError("no existe")
+
+    async def main():
+        assert await asyncio.gather(*(flight.do_async("a", fetch) for _ in range(4))) == ["ok"] * 4
+        results = await asyncio.gather(*(flight.do_async("b", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, LookupError) for result in results)
+
+    asyncio.run(main())
+    assert len(executions) == 1
+
+
+def test_async_leader_cancellation_promotes_a_follower():
+    flight = SingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("k", fetch))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(flight.do_async("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == ["ok"] * 3
+    # La lectura cancelada y una sola lectura nueva para los tres seguidores
+    assert len(executions) == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_follower_cancellation_does_not_affect_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        tasks = [asyncio.create_task(flight.do_async("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        tasks[1].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert results[0] == results[2] == "ok"
+    assert isinstance(results[1], asyncio.CancelledError)
@@ -0,0 +1,106 @@
+"""
+Mapa de token_version y cache de usuarios autenticados (sin base de datos).
+"""
+import time
+from types import SimpleNamespace
+
+from user.principal_cache import PrincipalCache
+from user.token_versions import DELETED, TokenVersions
+
+
+def test_unknown_user_is_loaded_then_known():
+    versions = TokenVersions(refresh_seconds=60, max_size=10)
+    assert versions.pending(1) == {1}
+    versions.load({1}, [(1, 0)])
+    assert versions.pending(1) == set()
+    assert versions.is_current(1, 0)
+    assert not versions.is_current(1, 1)
+
+
+def test_refresh_reloads_every_known_user_once():
+    versions = TokenVersions(refresh_seconds=60, max_size=10)
+    versions.load({1, 2}, [(1, 0), (2, 0)])
+    versions._refreshed_at -= 61
+    assert versions.pending(3) == {1, 2, 3}
+    # El refresco se marca al empezar: la petición concurrente no lo repite
+    assert versions.pending(1) == set()
+
+
+def test_load_never_lowers_a_version():
+    versions = TokenVersions(refresh_seconds=60, max_size=10)
+    versions.load({1}, [(1, 3)])
+    # change_password en esta instancia y, después, un refresco leído antes del cambio
+    versions.set(1, 4)
+    versions.load({1}, [(1, 3)])
+    assert versions.is_current(1, 4)
+    assert not versions.is_current(1, 3)
+    versions.load({1}, [(1, 5)])
+    assert versions.is_current(1, 5)
+
+
+def test_load_never_revives_a_deleted_user():
+    versions = TokenVersions(refresh_seconds=60, max_size=10)
+    versions.load({1}, [(1, 0)])
+    versions.set(1, DELETED)
+    versions.load({1}, [(1, 0)])
+    assert not versions.is_current(1, 0)
+
+
+def test_missing_row_is_a_deleted_user():
+    versions = TokenVersions(refresh_seconds=60, max_size=10)
+    versions.load({1}, [])
+    assert not versions.is_current(1, 0)
+    assert versions.stats()["rejected"] == 1
+
+
+def test_versions_are_bounded_lru():
+    versions = TokenVersions(refresh_seconds=60, max_size=2)
+    versions.load({1, 2}, [(1, 0), (2, 0)])
+    versions.is_current(1, 0)
+    versions.load({3}, [(3, 0)])
+    assert versions.stats()["size"] == 2
+    assert versions.pending(2) == {2}
+    assert versions.pending(1) == set()
+
+
+def user(user_id):
+    return SimpleNamespace(id=user_id, token_version=0)
+
+
+def test_principal_ttl_is_capped_at_token_exp():
+    cache = PrincipalCache(ttl=60, max_size=10)
+    cache.put("token", user(1), token_exp=time.time() - 1)
+    assert cache.get("token") is None
+
+    cache.put("token", user(1), token_exp=time.time() + 3600)
+    expires_at = cache._entries["token"][0]
+    assert expires_at <= time.time() + 60
+
+
+def test_principal_entries_expire_after_ttl():
+    cache = PrincipalCache(ttl=0.000001, max_size=10)
+    cache.put("token", user(1))
+    time.sleep(0.001)
+    assert cache.get("token") is None
+
+
+def test_principal_invalidate_user_removes_all_its_tokens():
+    cache = PrincipalCache(ttl=60, max_size=10)
+    cache.put("a", user(1))
+    cache.put("b", user(1))
+    cache.put("c", user(2))
+    cache.invalidate_user(1)
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c").id == 2
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_principal_cache_is_bounded_lru():
+    cache = PrincipalCache(ttl=60, max_size=2)
+    cache.put("a", user(1))
+    cache.put("b", user(2))
+    cache.get("a")
+    cache.put("c", user(3))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
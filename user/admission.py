@@ -0,0 +1,235 @@
+"""
+Control de admisión con token buckets para /auth/register y /auth/login.
+
+Cada petición consume un token de tres buckets: el de la IP del cliente, el del
+username (o email) del cuerpo desde esa IP y uno global que acota cuántos
+hashes bcrypt por segundo acepta la instancia. Si alguno está vacío se responde
+429 con Retry-After antes de tocar bcrypt o la base de datos, de modo que una
+ráfaga de credential stuffing no agote el pool de hashing ni los workers que
+sirven /customers. Los tres se comprueban juntos: una petición rechazada no
+consume de ninguno.
+
+El bucket de username va por (username, IP): un cliente anónimo que prueba
+contraseñas de un usuario agota solo su propio bucket y no bloquea el login
+del usuario desde otras IPs.
+
+Los buckets viven en memoria del proceso (ADMISSION_STORE=memory) o en un
+archivo SQLite compartido por los workers del mismo host
+(ADMISSION_STORE=sqlite:///ruta/admission.db).
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from .hashing import HASH_WORKERS
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_STORE = os.getenv("ADMISSION_STORE", "memory")
+# Peticiones por segundo y ráfaga máxima de cada bucket
+ADMISSION_IP_RATE = float(os.getenv("ADMISSION_IP_RATE", "1"))
+ADMISSION_IP_BURST = float(os.getenv("ADMISSION_IP_BURST", "10"))
+ADMISSION_USERNAME_RATE = float(os.getenv("ADMISSION_USERNAME_RATE", "0.2"))
+ADMISSION_USERNAME_BURST = float(os.getenv("ADMISSION_USERNAME_BURST", "5"))
+# Presupuesto de CPU: por defecto unos 4 hashes por segundo por worker de bcrypt
+ADMISSION_GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", str(HASH_WORKERS * 4)))
+ADMISSION_GLOBAL_BURST = float(os.getenv("ADMISSION_GLOBAL_BURST", str(HASH_WORKERS * 8)))
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "100000"))
+# Tomar la IP de X-Forwarded-For (detrás de un proxy como el de Vercel)
+ADMISSION_TRUST_FORWARDED = os.getenv(
+    "ADMISSION_TRUST_FORWARDED", "true" if os.getenv("VERCEL") else "false"
+).lower() in ("1", "true", "yes")
+
+
+def refill(tokens: float, updated_at: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated_at) * rate)
+
+
+def take_all(states, buckets, now):
+    """
+    Tokens de cada bucket tras consumir uno de todos, o sin consumir si alguno está
+    vacío; y la espera (segundos hasta el próximo token) de cada uno.
+    """
+    tokens = [refill(*(state or (burst, now)), now, rate, burst) for state, (_, rate, burst) in zip(states, buckets)]
+    waits = [0.0 if value >= 1 else (1 - value) / rate for value, (_, rate, _) in zip(tokens, buckets)]
+    if not any(waits):
+        tokens = [value - 1 for value in tokens]
+    return tokens, waits
+
+
+class MemoryBucketStore:
+    """Buckets en memoria del proceso (LRU acotado por ADMISSION_MAX_KEYS)"""
+
+    # take() no hace I/O: se puede llamar desde el event loop
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # clave -> (tokens, actualizado)
+        self._lock = threading.Lock()
+
+    def take(self, buckets, now: float):
+        """
+        Consumir un token de cada bucket [(clave, rate, burst)] solo si todos tienen
+        uno; devuelve la espera de cada bucket (todas 0 si se admitió)
+        """
+        with self._lock:
+            states = [self._buckets.pop(key, None) for key, _, _ in buckets]
+            tokens, waits = take_all(states, buckets, now)
+            for (key, _, _), value in zip(buckets, tokens):
+                self._buckets[key] = (value, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return waits
+
+
+class SQLiteBucketStore:
+    """Buckets en un archivo SQLite local, compartidos entre los workers del host"""
+
+    # take() espera el lock del archivo (hasta 1 s): se ejecuta en el threadpool
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL, updated_at REAL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, buckets, now: float):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            states = [
+                connection.execute("SELECT tokens, updated_at FROM bucket WHERE key = ?", (key,)).fetchone()
+                for key, _, _ in buckets
+            ]
+            tokens, waits = take_all(states, buckets, now)
+            connection.executemany(
+                "INSERT INTO bucket (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                [(key, value, now) for (key, _, _), value in zip(buckets, tokens)],
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return waits
+
+
+def create_store(store: str):
+    if store == "memory":
+        return MemoryBucketStore(ADMISSION_MAX_KEYS)
+    if store.startswith("sqlite:///"):
+        return SQLiteBucketStore(store[len("sqlite:///"):])
+    raise ValueError(f"ADMISSION_STORE no soportado: {store}")
+
+
+class AdmissionController:
+    """Buckets por IP, por username y global, con contadores de peticiones rechazadas"""
+
+    def __init__(self, store, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.limits = {
+            "ip": (ADMISSION_IP_RATE, ADMISSION_IP_BURST),
+            "username": (ADMISSION_USERNAME_RATE, ADMISSION_USERNAME_BURST),
+            "global": (ADMISSION_GLOBAL_RATE, ADMISSION_GLOBAL_BURST),
+        }
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._shed = {name: 0 for name in self.limits}
+        self._rejected = 0
+        self._unavailable = 0
+
+    def check(self, ip: str, username=None):
+        """Consumir de todos los buckets o de ninguno; 429 con Retry-After si alguno está vacío"""
+        if not self.enabled:
+            return
+        now = time.time()
+        keys = [("ip", ip), ("username", None if username is None else f"{username}|{ip}"), ("global", "")]
+        names = [name for name, value in keys if value is not None]
+        buckets = [(f"{name}:{value}", *self.limits[name]) for name, value in keys if value is not None]
+        try:
+            waits = self.store.take(buckets, now)
+        except sqlite3.OperationalError:
+            # SQLite bloqueado más allá del timeout: sobrecarga, no un error del servidor
+            with self._lock:
+                self._unavailable += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación saturado, intenta nuevamente",
+                headers={"Retry-After": "1"},
+            )
+        if any(waits):
+            with self._lock:
+                # Cada bucket vacío cuenta en shed; la petición, una vez en rejected
+                self._rejected += 1
+                for name, wait in zip(names, waits):
+                    if wait:
+                        self._shed[name] += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiados intentos, intenta nuevamente más tarde",
+                headers={"Retry-After": str(max(1, math.ceil(max(waits))))},
+            )
+        with self._lock:
+            self._admitted += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._admitted + self._rejected
+            return {
+                "enabled": self.enabled,
+                "store": type(self.store).__name__,
+                "limits": {name: {"rate": rate, "burst": burst} for name, (rate, burst) in self.limits.items()},
+                "admitted": self._admitted,
+                "shed": dict(self._shed),
+                "unavailable": self._unavailable,
+                "rejected": self._rejected,
+                "shed_ratio": round(self._rejected / total, 4) if total else 0.0,
+            }
+
+
+admission = AdmissionController(create_store(ADMISSION_STORE), ADMISSION_ENABLED)
+
+
+def client_ip(request: Request) -> str:
+    if ADMISSION_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "desconocida"
+
+
+async def admit(request: Request):
+    """
+    Dependency de register/login: se resuelve antes que el handler, es decir,
+    antes del hash bcrypt y de cualquier consulta.
+    """
+    if not admission.enabled:
+        return
+    username = None
+    try:
+        body = await request.json()
+        if isinstance(body, dict) and isinstance(body.get("username"), str):
+            username = body["username"].strip().lower()
+    except ValueError:
+        pass
+    if admission.store.blocking:
+        await run_in_threadpool(admission.check, client_ip(request), username)
+    else:
+        admission.check(client_ip(request), username)
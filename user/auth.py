@@ -1,13 +1,18 @@
+import os
+import threading
 from datetime import datetime, timedelta
 from typing import Optional
-from passlib.context import CryptContext
-from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from . import models, schemas
 from . import database
-from .database import get_db
+from .database import get_db, get_async_db, get_read_db, get_read_async_db
+from .hashing import hash_executor
+from .principal_cache import principal_cache
+from .token_versions import token_versions, versions_statement
 
 # Configuración de seguridad
 SECRET_KEY = "your-secret-key-here-change-in-production"  # ¡CAMBIAR EN PRODUCCIÓN!
@@ -15,19 +20,67 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 horas
 
 # Configuración de hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Costo de bcrypt: un número fijo o "auto" para calibrarlo en este host (ver user/hash_cost.py)
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS", "12")
+# passlib/bcrypt y python-jose se importan en el primer uso para no cargarlos en el cold start
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
 security = HTTPBearer()
 
+def get_pwd_context():
+    """CryptContext de passlib, creado en el primer uso"""
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+
+                _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=bcrypt_rounds())
+    return _pwd_context
+
+def bcrypt_rounds() -> int:
+    from .hash_cost import BCRYPT_MIN_ROUNDS, calibrate
+
+    if BCRYPT_ROUNDS == "auto":
+        return calibrate()[0]
+    return max(int(BCRYPT_ROUNDS), BCRYPT_MIN_ROUNDS)
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    # Tarea del pool de bcrypt: el CryptContext (y la calibración con
+    # BCRYPT_ROUNDS=auto) se resuelve ahí, nunca en el event loop
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+def warm_up_pwd_context():
+    """
+    Al arrancar la app: con BCRYPT_ROUNDS=auto la calibración se encola en el pool
+    de bcrypt en lugar de ejecutarse dentro del primer login o registro.
+    """
+    if BCRYPT_ROUNDS == "auto" and _pwd_context is None:
+        hash_executor.submit(get_pwd_context)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verificar contraseña"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verificar contraseña (en el pool de bcrypt)"""
+    return hash_executor.run(check_password, plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Generar hash de contraseña"""
-    return pwd_context.hash(password)
+    """Generar hash de contraseña (en el pool de bcrypt)"""
+    return hash_executor.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verificar contraseña sin bloquear el event loop"""
+    return await hash_executor.run_async(check_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generar hash de contraseña sin bloquear el event loop"""
+    return await hash_executor.run_async(hash_password, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crear token de acceso JWT"""
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -38,8 +91,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_claims(user) -> dict:
+    """Claims del token de acceso: identidad del usuario y su token_version"""
+    return {"sub": user.username, "id": user.id, "email": user.email, "ver": user.token_version}
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verificar token JWT"""
+    from jose import JWTError, jwt
+
     token = credentials.credentials
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,28 +111,131 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = schemas.TokenData(username=username)
+        token_data = schemas.TokenData(
+            username=username,
+            exp=payload.get("exp"),
+            id=payload.get("id"),
+            email=payload.get("email"),
+            token_version=payload.get("ver"),
+        )
     except JWTError:
         raise credentials_exception
     
     return token_data
 
-def get_current_user(db: Session = Depends(get_db), token_data: schemas.TokenData = Depends(verify_token)):
-    """Obtener usuario actual basado en el token"""
-    user = get_user_by_username(db, username=token_data.username)
+def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Obtener usuario actual basado en el token.
+    Si el token está en principal_cache no se decodifica ni se consulta la base de datos;
+    el usuario devuelto puede estar desasociado de `db` (usar db.merge para modificarlo).
+    """
+    return load_current_user(db, credentials)
+
+def get_current_user_read(db: Session = Depends(get_read_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """get_current_user para handlers de solo lectura (réplica si está configurada)"""
+    return load_current_user(db, credentials)
+
+def load_current_user(db: Session, credentials: HTTPAuthorizationCredentials):
+    user = principal_cache.get(credentials.credentials)
+    if user is not None:
+        user_ids = token_versions.pending(user.id)
+        if user_ids:
+            load_token_versions(db, user_ids)
+        if cached_user_is_current(user):
+            return user
+
+    token_data = verify_token(credentials)
+    if token_data.id is not None:
+        user = db.get(models.User, token_data.id)
+    else:
+        user = get_user_by_username(db, username=token_data.username)
+    check_loaded_user(user, token_data)
+    # Lo leído de la réplica puede estar atrasado: el cache solo se llena desde la principal
+    if not db.info.get("replica"):
+        principal_cache.put(credentials.credentials, user, token_data.exp)
+    return user
+
+def load_token_versions(db: Session, user_ids):
+    """
+    Cargar token_versions siempre desde la principal: una réplica atrasada aún no
+    tiene a los usuarios recién registrados y load() los daría por eliminados.
+    """
+    if not db.info.get("replica"):
+        token_versions.load(user_ids, db.execute(versions_statement(user_ids)).all())
+        return
+    with database.SessionLocal() as primary:
+        token_versions.load(user_ids, primary.execute(versions_statement(user_ids)).all())
+
+def cached_user_is_current(user) -> bool:
+    """
+    Un acierto de principal_cache se contrasta con token_versions: un cambio de
+    contraseña o un borrado en otra instancia invalida la entrada en cuanto
+    token_versions se refresca, sin esperar al TTL del cache. Si no está vigente
+    se descarta y el token se valida contra la base de datos.
+    """
+    if token_versions.is_current(user.id, user.token_version):
+        return True
+    principal_cache.invalidate_user(user.id)
+    return False
+
+def check_loaded_user(user, token_data: schemas.TokenData):
+    """401 si el usuario no existe o si el token es de una token_version anterior"""
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario no encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    if token_data.token_version is not None and token_data.token_version != user.token_version:
+        raise revoked_token_exception()
+
+def revoked_token_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token revocado",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def get_current_principal(db: Session = Depends(get_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Identidad del usuario actual (id, username, email) tomada de los claims del
+    token, sin consultar la base de datos: la revocación se comprueba contra
+    token_versions, que solo lee Postgres al ver un usuario nuevo o al refrescar.
+    Para handlers que solo necesitan saber quién llama. Los tokens sin claims
+    (emitidos antes de token_version) se resuelven como en get_current_user.
+    """
+    token_data = verify_token(credentials)
+    if token_data.id is None or token_data.token_version is None:
+        return principal_from_user(load_current_user(db, credentials), token_data)
+
+    user_ids = token_versions.pending(token_data.id)
+    if user_ids:
+        load_token_versions(db, user_ids)
+        # Devolver la conexión al pool: el handler puede leer con otra sesión (get_read_db)
+        db.commit()
+    if not token_versions.is_current(token_data.id, token_data.token_version):
+        raise revoked_token_exception()
+    return token_data
+
+def principal_from_user(user, token_data: schemas.TokenData) -> schemas.TokenData:
+    return schemas.TokenData(
+        username=user.username, exp=token_data.exp, id=user.id, email=user.email, token_version=user.token_version
+    )
+
+def login_condition(username: str):
+    """
+    Condición de búsqueda para login: con '@' se busca por email y si no por
+    username (los usernames no admiten '@'), sin distinguir mayúsculas. Cada rama
+    usa su índice único lower(...) de create_indexes.sql en lugar de un OR entre
+    dos índices.
+    """
+    if "@" in username:
+        return func.lower(models.User.email) == username.lower()
+    return func.lower(models.User.username) == username.lower()
 
 def get_user_by_username(db: Session, username: str):
     """Obtener usuario por nombre de usuario o email"""
-    return db.query(models.User).filter(
-        (models.User.username == username) | (models.User.email == username)
-    ).first()
+    return db.query(models.User).filter(login_condition(username)).first()
 
 def authenticate_user(db: Session, username: str, password: str):
     """Autenticar usuario con credenciales"""
@@ -82,4 +244,115 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     if not verify_password(password, user.password_hash):
         return False
+    rehash_in_background(user, password)
+    return user
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    needs_update de passlib, pero sin bajar nunca el costo de bcrypt: con
+    BCRYPT_ROUNDS=auto cada instancia calibra contra su hardware, y si se
+    rehasheara a cualquier costo distinto, instancias con resultados distintos
+    se reescribirían los hashes entre sí en cada login. Un hash bcrypt con igual
+    o más rounds que los configurados se conserva.
+    """
+    context = get_pwd_context()
+    if not context.needs_update(hashed_password):
+        return False
+    if context.identify(hashed_password) != "bcrypt":
+        return True
+    handler = context.handler("bcrypt")
+    stored = handler.from_string(hashed_password)
+    return stored.rounds < handler.default_rounds or stored.ident != handler.default_ident
+
+def rehash_in_background(user, password: str):
+    """
+    Si el hash guardado tiene menos costo o un esquema obsoleto (needs_rehash),
+    recalcularlo en el pool de bcrypt sin demorar la respuesta del login.
+    Con la cola llena se omite: se reintenta en el siguiente login.
+    Se llama tras verify_password, así que el CryptContext ya existe.
+    """
+    if not needs_rehash(user.password_hash):
+        return
+    try:
+        hash_executor.submit(rehash_password, user.id, user.password_hash, password)
+    except HTTPException:
+        pass
+
+def rehash_password(user_id: int, old_hash: str, password: str):
+    new_hash = hash_password(password)
+    # Solo si el hash no cambió entretanto (p. ej. por un change_password)
+    with database.SessionLocal() as db:
+        db.execute(
+            update(models.User)
+            .where(models.User.id == user_id, models.User.password_hash == old_hash)
+            .values(password_hash=new_hash)
+        )
+        db.commit()
+
+# Variantes async (DB_MODE=async)
+
+async def get_current_user_async(db: AsyncSession = Depends(get_async_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Obtener usuario actual basado en el token (sesión async, mismo cache que get_current_user)"""
+    return await load_current_user_async(db, credentials)
+
+async def get_current_user_read_async(db: AsyncSession = Depends(get_read_async_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """get_current_user_async para handlers de solo lectura (réplica si está configurada)"""
+    return await load_current_user_async(db, credentials)
+
+async def load_current_user_async(db: AsyncSession, credentials: HTTPAuthorizationCredentials):
+    user = principal_cache.get(credentials.credentials)
+    if user is not None:
+        user_ids = token_versions.pending(user.id)
+        if user_ids:
+            await load_token_versions_async(db, user_ids)
+        if cached_user_is_current(user):
+            return user
+
+    token_data = verify_token(credentials)
+    if token_data.id is not None:
+        user = await db.get(models.User, token_data.id)
+    else:
+        user = await get_user_by_username_async(db, username=token_data.username)
+    check_loaded_user(user, token_data)
+    if not db.info.get("replica"):
+        principal_cache.put(credentials.credentials, user, token_data.exp)
+    return user
+
+async def load_token_versions_async(db: AsyncSession, user_ids):
+    """load_token_versions con sesión async"""
+    if not db.info.get("replica"):
+        result = await db.execute(versions_statement(user_ids))
+        token_versions.load(user_ids, result.all())
+        return
+    async with database.async_primary_session() as primary:
+        result = await primary.execute(versions_statement(user_ids))
+        token_versions.load(user_ids, result.all())
+
+async def get_current_principal_async(db: AsyncSession = Depends(get_async_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """get_current_principal con sesión async (mismo mapa de token_versions)"""
+    token_data = verify_token(credentials)
+    if token_data.id is None or token_data.token_version is None:
+        return principal_from_user(await load_current_user_async(db, credentials), token_data)
+
+    user_ids = token_versions.pending(token_data.id)
+    if user_ids:
+        await load_token_versions_async(db, user_ids)
+        await db.commit()
+    if not token_versions.is_current(token_data.id, token_data.token_version):
+        raise revoked_token_exception()
+    return token_data
+
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    """Obtener usuario por nombre de usuario o email (sesión async)"""
+    result = await db.execute(select(models.User).filter(login_condition(username)))
+    return result.scalars().first()
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    """Autenticar usuario con credenciales (sesión async)"""
+    user = await get_user_by_username_async(db, username)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.password_hash):
+        return False
+    rehash_in_background(user, password)
     return user
@@ -1,5 +1,12 @@
 # Importar configuración unificada de base de datos
-from database import engine, SessionLocal, Base, get_db, test_connection
+import database as _database
+from database import SessionLocal, Base, async_primary_session, get_db, get_async_db, get_read_db, get_read_async_db, test_connection
 
 # Re-exportar para mantener compatibilidad
-__all__ = ['engine', 'SessionLocal', 'Base', 'get_db', 'test_connection']
+__all__ = ['engine', 'SessionLocal', 'Base', 'async_primary_session', 'get_db', 'get_async_db', 'get_read_db', 'get_read_async_db', 'test_connection']
+
+def __getattr__(name):
+    # El engine se crea en el primer uso (ver database.get_engine)
+    if name == "engine":
+        return _database.get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,67 @@
+"""
+Calibración del costo (rounds) de bcrypt contra una latencia objetivo.
+
+Mide en este host cuánto tarda un hash con el costo mínimo y sube de a uno (cada
+round duplica el tiempo) mientras el siguiente costo siga dentro de
+BCRYPT_TARGET_MS. Nunca baja de BCRYPT_MIN_ROUNDS.
+
+Con BCRYPT_ROUNDS=auto, user.auth calibra al crear el CryptContext, en el pool de
+bcrypt y al arrancar la app (lifespan). Como cada instancia puede calibrar un
+costo distinto, el login solo rehashea hashes con menos rounds (needs_rehash),
+nunca hacia abajo. Para fijar el valor en la configuración:
+    python -m user.hash_cost --target-ms 250
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = 16
+
+
+def hash_time_ms(rounds: int, samples: int = 3) -> float:
+    """Mediana de lo que tarda un hash bcrypt con `rounds` en este host"""
+    from passlib.hash import bcrypt
+
+    hasher = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("calibracion-bcrypt")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float = BCRYPT_TARGET_MS, min_rounds: int = BCRYPT_MIN_ROUNDS,
+              max_rounds: int = BCRYPT_MAX_ROUNDS):
+    """
+    Mayor costo cuyo hash tarda como mucho `target_ms` (o `min_rounds` si ni
+    siquiera ese lo cumple). Devuelve (rounds, ms medidos con ese costo).
+    """
+    rounds = min_rounds
+    elapsed = hash_time_ms(rounds)
+    while rounds < max_rounds and elapsed * 2 <= target_ms:
+        next_elapsed = hash_time_ms(rounds + 1, samples=1)
+        if next_elapsed > target_ms:
+            break
+        rounds, elapsed = rounds + 1, next_elapsed
+    return rounds, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=BCRYPT_TARGET_MS, help="latencia objetivo de un hash")
+    parser.add_argument("--min-rounds", type=int, default=BCRYPT_MIN_ROUNDS)
+    args = parser.parse_args()
+
+    rounds, elapsed = calibrate(args.target_ms, args.min_rounds)
+    print(f"Hash con {rounds} rounds: {elapsed:.1f} ms (objetivo {args.target_ms:.0f} ms)")
+    print(f"BCRYPT_ROUNDS={rounds}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
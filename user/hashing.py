@@ -0,0 +1,118 @@
+"""
+Ejecutor dedicado para bcrypt con concurrencia y cola acotadas.
+
+El hash y la verificación de contraseñas se ejecutan en un pool propio con
+HASH_WORKERS threads y como máximo HASH_QUEUE_SIZE tareas esperando. Cuando la
+cola está llena se responde 503 con Retry-After de inmediato, en lugar de ocupar
+todos los threads de Starlette y bloquear endpoints baratos como GET /customers/{id}.
+
+Con DB_MODE=sync los handlers esperan con run() (.result()) desde un thread de
+Starlette, así que cada tarea en cola o en ejecución retiene uno de esos threads
+(40, el límite por defecto de anyio). Por eso en ese modo workers + cola se
+acotan a HASH_MAX_PARKED_THREADS (una cuarta parte), dejando siempre al menos
+una plaza de cola aunque HASH_WORKERS ya alcance ese límite; en modo async
+run_async() no retiene threads y la cola puede ser más larga.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from database import DB_MODE
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "32"))
+# Threads de Starlette que bcrypt puede retener en modo sync (de los 40 de anyio)
+STARLETTE_THREADS = 40
+HASH_MAX_PARKED_THREADS = int(os.getenv("HASH_MAX_PARKED_THREADS", str(STARLETTE_THREADS // 4)))
+HASH_RETRY_AFTER_SECONDS = int(os.getenv("HASH_RETRY_AFTER_SECONDS", "1"))
+
+
+def queue_limit(workers: int, queue_size: int, mode: str = DB_MODE) -> int:
+    """Cola efectiva: en modo sync workers + cola no superan HASH_MAX_PARKED_THREADS
+
+    Con workers >= HASH_MAX_PARKED_THREADS se deja una plaza de cola: con 0 cada
+    llamada que llega mientras los workers están ocupados recibiría 503.
+    """
+    if mode != "sync":
+        return queue_size
+    return min(queue_size, max(1, HASH_MAX_PARKED_THREADS - workers))
+
+
+class HashExecutor:
+    """Pool de threads para bcrypt con admisión acotada y métricas de cola"""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # Plazas totales: las que se ejecutan más las que esperan en cola
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, fn, *args) -> Future:
+        """Encolar una tarea o rechazarla con 503 si la cola está llena"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio de autenticación saturado, intenta nuevamente",
+                headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)},
+            )
+
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        def task():
+            wait = time.perf_counter() - enqueued_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                self._slots.release()
+
+        return self._executor.submit(task)
+
+    def run(self, fn, *args):
+        """Ejecutar en el pool y esperar el resultado (handlers sync: retiene el thread que llama)"""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn, *args):
+        """Ejecutar en el pool sin bloquear el event loop (handlers async)"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        """Profundidad de cola, tiempos de espera y contadores"""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_ms_avg": round(self._wait_total / started * 1000, 3) if started else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+            }
+
+
+hash_executor = HashExecutor(HASH_WORKERS, queue_limit(HASH_WORKERS, HASH_QUEUE_SIZE))
@@ -1,58 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import update
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
-from typing import List
-from . import models, schemas, auth
-from .database import get_db
+from typing import List, Literal, Optional
+from . import models, schemas, auth, admission
+from .principal_cache import principal_cache
+from .token_versions import DELETED, token_versions
+from .database import get_db, get_read_db
+import fast_read
+import pagination
+from singleflight import coalescer, flight_key
 
 # Las tablas deben existir previamente en Supabase
 # No crear tablas automáticamente en serverless para evitar errores de conexión
 
+# Columnas por las que se puede paginar con cursor (todas NOT NULL)
+SORT_COLUMNS = {
+    "id": models.User.id,
+    "created_at": models.User.created_at,
+    "username": models.User.username,
+}
+
+# Columnas de schemas.UserResponse para la lectura sin ORM (nunca password_hash)
+USER_RESPONSE_FIELDS = list(schemas.UserResponse.model_fields)
+USER_RESPONSE_COLUMNS = [getattr(models.User, name) for name in USER_RESPONSE_FIELDS]
+
 router = APIRouter(
     prefix="/auth",
     tags=["authentication"],
 )
 
+def duplicate_detail(error: IntegrityError, email_detail: str, username_detail: str) -> str:
+    """Mensaje 400 según la restricción UNIQUE violada (email o username)"""
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None) or str(error.orig)
+    return email_detail if "email" in constraint else username_detail
+
 @router.get("/test")
 def test_endpoint():
     """Endpoint de prueba simple"""
     return {"message": "Auth endpoints funcionando correctamente"}
 
-@router.post("/register", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=schemas.UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admission.admit)],
+)
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """
     Registrar un nuevo usuario
+    Los duplicados se detectan por las restricciones UNIQUE (INSERT ... RETURNING)
+    en lugar de consultar antes.
     """
-    # Verificar si el usuario ya existe
-    db_user = auth.get_user_by_username(db, username=user.username)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El nombre de usuario ya está registrado"
-        )
-    
-    # Verificar si el email ya existe
-    db_email = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_email:
+    hashed_password = auth.get_password_hash(user.password)
+    try:
+        db_user = db.execute(
+            insert(models.User)
+            .values(username=user.username, email=user.email, password_hash=hashed_password)
+            .returning(models.User)
+        ).scalar_one()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El email ya está registrado"
+            detail=duplicate_detail(e, "El email ya está registrado", "El nombre de usuario ya está registrado")
         )
-    
-    # Crear nuevo usuario
-    hashed_password = auth.get_password_hash(user.password)
-    db_user = models.User(
-        username=user.username,
-        email=user.email,
-        password_hash=hashed_password
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    # Las lecturas de /users en curso no incluyen el nuevo usuario
+    coalescer.invalidate()
     return db_user
 
-@router.post("/login", response_model=schemas.Token)
+@router.post("/login", response_model=schemas.Token, dependencies=[Depends(admission.admit)])
 def login_user(form_data: schemas.UserLogin, db: Session = Depends(get_db)):
     """
     Iniciar sesión de usuario
@@ -67,7 +86,7 @@ def login_user(form_data: schemas.UserLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=auth.token_claims(user), expires_delta=access_token_expires
     )
     
     return {
@@ -78,7 +97,7 @@ def login_user(form_data: schemas.UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.get("/me", response_model=schemas.UserResponse)
-def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
+def read_users_me(current_user: models.User = Depends(auth.get_current_user_read)):
     """
     Obtener información del usuario actual
     """
@@ -101,30 +120,6 @@ def update_user_me(
             detail="No hay datos para actualizar"
         )
     
-    # Verificar si el username ya existe (si se está actualizando)
-    if "username" in update_data:
-        existing_user = db.query(models.User).filter(
-            models.User.username == update_data["username"],
-            models.User.id != current_user.id
-        ).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El nombre de usuario ya está en uso"
-            )
-    
-    # Verificar si el email ya existe (si se está actualizando)
-    if "email" in update_data:
-        existing_email = db.query(models.User).filter(
-            models.User.email == update_data["email"],
-            models.User.id != current_user.id
-        ).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El email ya está en uso"
-            )
-    
     # Hash de la nueva contraseña si se proporciona
     if "password" in update_data:
         update_data["password_hash"] = auth.get_password_hash(update_data.pop("password"))
@@ -132,13 +127,25 @@ def update_user_me(
     # Actualizar timestamp
     update_data["updated_at"] = datetime.now()
     
-    # Aplicar actualizaciones
-    for key, value in update_data.items():
-        setattr(current_user, key, value)
-    
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    # UPDATE ... RETURNING; username/email duplicados se detectan por las restricciones UNIQUE
+    try:
+        updated_user = db.execute(
+            update(models.User)
+            .where(models.User.id == current_user.id)
+            .values(**update_data)
+            .returning(models.User)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        ).scalar_one()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=duplicate_detail(e, "El email ya está en uso", "El nombre de usuario ya está en uso")
+        )
+    principal_cache.invalidate_user(current_user.id)
+    coalescer.invalidate()
+    return updated_user
 
 @router.post("/change-password")
 def change_password(
@@ -156,12 +163,23 @@ def change_password(
             detail="La contraseña actual es incorrecta"
         )
     
-    # Actualizar contraseña
+    # Actualizar contraseña e incrementar token_version: los tokens emitidos antes dejan de valer
     new_password_hash = auth.get_password_hash(password_data.new_password)
-    current_user.password_hash = new_password_hash
-    current_user.updated_at = datetime.now()
-    
+    token_version = db.execute(
+        update(models.User)
+        .where(models.User.id == current_user.id)
+        .values(
+            password_hash=new_password_hash,
+            updated_at=datetime.now(),
+            token_version=models.User.token_version + 1,
+        )
+        .returning(models.User.token_version)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
     db.commit()
+    principal_cache.invalidate_user(current_user.id)
+    coalescer.invalidate()
+    token_versions.set(current_user.id, token_version)
     
     return {"message": "Contraseña actualizada exitosamente"}
 
@@ -173,45 +191,72 @@ def delete_user_me(
     """
     Eliminar cuenta del usuario actual
     """
-    db.delete(current_user)
+    db.delete(db.merge(current_user, load=False))
     db.commit()
+    principal_cache.invalidate_user(current_user.id)
+    coalescer.invalidate()
+    token_versions.set(current_user.id, DELETED)
     return {"message": "Cuenta eliminada exitosamente"}
 
 # Endpoints adicionales para administración (requieren permisos especiales)
 @router.get("/users", response_model=List[schemas.UserResponse])
 def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    sort: Literal["id", "created_at", "username"] = "id",
+    current_user: schemas.TokenData = Depends(auth.get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     Listar todos los usuarios (endpoint administrativo)
+    Con `cursor` (vacío para la primera página) se pagina por keyset y el cursor
+    de la siguiente página se devuelve en el header X-Next-Cursor.
     """
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    return users
+    # Peticiones concurrentes con los mismos parámetros comparten una sola lectura
+    key = flight_key(("users", skip, limit, cursor, sort), db)
+    return fast_read.copy(coalescer.do(key, lambda: fetch_users(db, response, skip, limit, cursor, sort)))
+
+def fetch_users(db: Session, response: Response, skip: int, limit: int, cursor: Optional[str], sort: str):
+    # Lectura sin ORM: filas de Core serializadas con orjson (ver fast_read)
+    query = select(*USER_RESPONSE_COLUMNS)
+    if cursor is None:
+        users = db.execute(query.offset(skip).limit(limit)).all()
+        return fast_read.render(fast_read.row_dicts(users, USER_RESPONSE_FIELDS))
+
+    users = db.execute(pagination.apply_keyset(
+        query, sort, SORT_COLUMNS[sort], models.User.id, cursor, limit
+    )).all()
+    next_cursor = pagination.next_cursor(users, sort, sort, "id", limit)
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return fast_read.render(fast_read.row_dicts(users, USER_RESPONSE_FIELDS), response)
 
 @router.get("/users/{user_id}", response_model=schemas.UserResponse)
 def get_user(
     user_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.TokenData = Depends(auth.get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtener usuario por ID (endpoint administrativo)
     """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    return fast_read.copy(coalescer.do(flight_key(("user", user_id), db), lambda: fetch_user(db, user_id)))
+
+def fetch_user(db: Session, user_id: int):
+    user = db.execute(select(*USER_RESPONSE_COLUMNS).where(models.User.id == user_id)).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado"
         )
-    return user
+    return fast_read.render(fast_read.row_dicts([user], USER_RESPONSE_FIELDS)[0])
 
 @router.delete("/users/{user_id}")
 def delete_user(
     user_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: schemas.TokenData = Depends(auth.get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -226,4 +271,7 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    principal_cache.invalidate_user(user_id)
+    coalescer.invalidate()
+    token_versions.set(user_id, DELETED)
     return {"message": "Usuario eliminado exitosamente"}
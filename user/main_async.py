@@ -0,0 +1,257 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
+from . import models, schemas, auth, admission
+from .principal_cache import principal_cache
+from .token_versions import DELETED, token_versions
+from .database import get_async_db, get_read_async_db
+from .main import SORT_COLUMNS, USER_RESPONSE_COLUMNS, USER_RESPONSE_FIELDS, duplicate_detail
+import fast_read
+from singleflight import coalescer, flight_key
+import pagination
+
+# Versión async de los endpoints de autenticación (DB_MODE=async).
+# Las rutas que no están aquí se sirven con la implementación sync de user.main
+
+router = APIRouter(
+    prefix="/auth",
+    tags=["authentication"],
+)
+
+@router.post(
+    "/register",
+    response_model=schemas.UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admission.admit)],
+)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Registrar un nuevo usuario
+    """
+    hashed_password = await auth.get_password_hash_async(user.password)
+    try:
+        result = await db.execute(
+            insert(models.User)
+            .values(username=user.username, email=user.email, password_hash=hashed_password)
+            .returning(models.User)
+        )
+        db_user = result.scalar_one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=duplicate_detail(e, "El email ya está registrado", "El nombre de usuario ya está registrado")
+        )
+    # Las lecturas de /users en curso no incluyen el nuevo usuario
+    coalescer.invalidate()
+    return db_user
+
+@router.post("/login", response_model=schemas.Token, dependencies=[Depends(admission.admit)])
+async def login_user(form_data: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    """
+    Iniciar sesión de usuario
+    """
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Nombre de usuario o contraseña incorrectos",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = auth.create_access_token(
+        data=auth.token_claims(user), expires_delta=access_token_expires
+    )
+
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": auth.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "user": user
+    }
+
+@router.get("/me", response_model=schemas.UserResponse)
+async def read_users_me(current_user: models.User = Depends(auth.get_current_user_read_async)):
+    """
+    Obtener información del usuario actual
+    """
+    return current_user
+
+@router.put("/me", response_model=schemas.UserResponse)
+async def update_user_me(
+    user_update: schemas.UserUpdate,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Actualizar información del usuario actual
+    """
+    update_data = user_update.dict(exclude_unset=True)
+
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No hay datos para actualizar"
+        )
+
+    # Hash de la nueva contraseña si se proporciona
+    if "password" in update_data:
+        update_data["password_hash"] = await auth.get_password_hash_async(update_data.pop("password"))
+
+    # Actualizar timestamp
+    update_data["updated_at"] = datetime.now()
+
+    try:
+        result = await db.execute(
+            update(models.User)
+            .where(models.User.id == current_user.id)
+            .values(**update_data)
+            .returning(models.User)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        updated_user = result.scalar_one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=duplicate_detail(e, "El email ya está en uso", "El nombre de usuario ya está en uso")
+        )
+    principal_cache.invalidate_user(current_user.id)
+    coalescer.invalidate()
+    return updated_user
+
+@router.post("/change-password")
+async def change_password(
+    password_data: schemas.ChangePassword,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cambiar contraseña del usuario actual
+    """
+    # Verificar contraseña actual
+    if not await auth.verify_password_async(password_data.current_password, current_user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La contraseña actual es incorrecta"
+        )
+
+    # Actualizar contraseña e incrementar token_version: los tokens emitidos antes dejan de valer
+    new_password_hash = await auth.get_password_hash_async(password_data.new_password)
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == current_user.id)
+        .values(
+            password_hash=new_password_hash,
+            updated_at=datetime.now(),
+            token_version=models.User.token_version + 1,
+        )
+        .returning(models.User.token_version)
+        .execution_options(synchronize_session=False)
+    )
+    token_version = result.scalar_one()
+    await db.commit()
+    principal_cache.invalidate_user(current_user.id)
+    coalescer.invalidate()
+    token_versions.set(current_user.id, token_version)
+
+    return {"message": "Contraseña actualizada exitosamente"}
+
+@router.delete("/me")
+async def delete_user_me(
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Eliminar cuenta del usuario actual
+    """
+    await db.delete(await db.merge(current_user, load=False))
+    await db.commit()
+    principal_cache.invalidate_user(current_user.id)
+    coalescer.invalidate()
+    token_versions.set(current_user.id, DELETED)
+    return {"message": "Cuenta eliminada exitosamente"}
+
+# Endpoints adicionales para administración (requieren permisos especiales)
+@router.get("/users", response_model=List[schemas.UserResponse])
+async def list_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: Literal["id", "created_at", "username"] = "id",
+    current_user: schemas.TokenData = Depends(auth.get_current_principal_async),
+    db: AsyncSession = Depends(get_read_async_db)
+):
+    """
+    Listar todos los usuarios (endpoint administrativo)
+    """
+    key = flight_key(("users", skip, limit, cursor, sort), db)
+    return fast_read.copy(await coalescer.do_async(key, lambda: fetch_users(db, response, skip, limit, cursor, sort)))
+
+async def fetch_users(db: AsyncSession, response: Response, skip: int, limit: int, cursor: Optional[str], sort: str):
+    query = select(*USER_RESPONSE_COLUMNS)
+    if cursor is None:
+        result = await db.execute(query.offset(skip).limit(limit))
+        return fast_read.render(fast_read.row_dicts(result.all(), USER_RESPONSE_FIELDS))
+
+    result = await db.execute(pagination.apply_keyset(
+        query, sort, SORT_COLUMNS[sort], models.User.id, cursor, limit
+    ))
+    users = result.all()
+    next_cursor = pagination.next_cursor(users, sort, sort, "id", limit)
+    if next_cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
+    return fast_read.render(fast_read.row_dicts(users, USER_RESPONSE_FIELDS), response)
+
+@router.get("/users/{user_id}", response_model=schemas.UserResponse)
+async def get_user(
+    user_id: int,
+    current_user: schemas.TokenData = Depends(auth.get_current_principal_async),
+    db: AsyncSession = Depends(get_read_async_db)
+):
+    """
+    Obtener usuario por ID (endpoint administrativo)
+    """
+    return fast_read.copy(
+        await coalescer.do_async(flight_key(("user", user_id), db), lambda: fetch_user(db, user_id))
+    )
+
+async def fetch_user(db: AsyncSession, user_id: int):
+    result = await db.execute(select(*USER_RESPONSE_COLUMNS).where(models.User.id == user_id))
+    user = result.first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    return fast_read.render(fast_read.row_dicts([user], USER_RESPONSE_FIELDS)[0])
+
+@router.delete("/users/{user_id}")
+async def delete_user(
+    user_id: int,
+    current_user: schemas.TokenData = Depends(auth.get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Eliminar usuario por ID (endpoint administrativo)
+    """
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+
+    await db.delete(user)
+    await db.commit()
+    principal_cache.invalidate_user(user_id)
+    coalescer.invalidate()
+    token_versions.set(user_id, DELETED)
+    return {"message": "Usuario eliminado exitosamente"}
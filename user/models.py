@@ -11,3 +11,5 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('NOW()'))
     updated_at = Column(TIMESTAMP(timezone=True))
+    # Se incrementa al cambiar la contraseña: invalida los tokens emitidos antes
+    token_version = Column(Integer, nullable=False, server_default=text('0'))
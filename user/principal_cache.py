@@ -0,0 +1,103 @@
+"""
+Cache en proceso de usuarios autenticados (principal) por token.
+
+Un acierto devuelve el usuario sin decodificar de nuevo el JWT ni consultar
+Postgres. Las entradas expiran a los PRINCIPAL_CACHE_TTL_SECONDS (o antes, si el
+token vence primero), el tamaño está acotado por PRINCIPAL_CACHE_MAX_SIZE (LRU) y
+los endpoints que modifican o eliminan un usuario invalidan sus entradas. Los
+cambios hechos en otras instancias se detectan al comprobar cada acierto contra
+token_versions (ver auth.load_current_user).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+
+class PrincipalCache:
+    """LRU con TTL de token -> usuario, con índice por id para invalidar"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # token -> (expira, user_id, usuario)
+        self._tokens_by_user = {}  # user_id -> {tokens}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, token: str):
+        """Usuario cacheado para el token, o None si no hay entrada vigente"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(token)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self._hits += 1
+            return entry[2]
+
+    def put(self, token: str, user, token_exp: Optional[float] = None):
+        """Guardar el usuario sin exceder el vencimiento del propio token"""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (expires_at, user.id, user)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        """Eliminar todas las entradas de un usuario (tras modificarlo o borrarlo)"""
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token: str):
+        # Llamar con el lock tomado
+        _, user_id, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_SIZE)
@@ -2,15 +2,23 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+# El login distingue username de email por el '@' (ver auth.login_condition).
+# Solo se valida en la entrada: los usuarios antiguos con '@' en el username se
+# siguen devolviendo tal cual e inician sesión con su email.
+USERNAME_PATTERN = r"^[^@]+$"
+
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50, description="Nombre de usuario único")
     email: str = Field(..., description="Correo electrónico válido")
 
 class UserCreate(UserBase):
+    username: str = Field(
+        ..., min_length=3, max_length=50, pattern=USERNAME_PATTERN, description="Nombre de usuario único (sin '@')"
+    )
     password: str = Field(..., min_length=6, max_length=100, description="Contraseña del usuario")
 
 class UserUpdate(BaseModel):
-    username: Optional[str] = Field(None, min_length=3, max_length=50)
+    username: Optional[str] = Field(None, min_length=3, max_length=50, pattern=USERNAME_PATTERN)
     email: Optional[str] = None
     password: Optional[str] = Field(None, min_length=6, max_length=100)
 
@@ -34,6 +42,11 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    exp: Optional[int] = None
+    # Claims de identidad (ausentes en tokens emitidos antes de token_version)
+    id: Optional[int] = None
+    email: Optional[str] = None
+    token_version: Optional[int] = None
 
 class ChangePassword(BaseModel):
     current_password: str = Field(..., description="Contraseña actual")
@@ -0,0 +1,128 @@
+"""
+Mapa en proceso de user_id -> token_version para revocar tokens sin consultar
+Postgres en cada petición.
+
+Los tokens llevan la versión del usuario al momento del login (claim "ver").
+change_password y la eliminación de la cuenta incrementan la versión en la base
+de datos (o borran la fila), con lo que los tokens anteriores dejan de valer.
+
+Cada instancia guarda la versión de los usuarios que vio y la refresca en bloque
+(un solo SELECT ... WHERE id = ANY(:ids)) cada TOKEN_VERSION_REFRESH_SECONDS; un
+usuario que no está en el mapa se carga al verlo por primera vez. Los cambios
+hechos en esta instancia se aplican de inmediato y los de otras instancias, como
+mucho, un intervalo de refresco después.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from . import models
+
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "30"))
+TOKEN_VERSION_MAX_SIZE = int(os.getenv("TOKEN_VERSION_MAX_SIZE", "100000"))
+
+# Versión de un usuario eliminado: ningún token la tiene
+DELETED = None
+
+
+def versions_statement(user_ids):
+    """SELECT id, token_version de los usuarios en `user_ids` (un solo parámetro array)"""
+    return select(models.User.id, models.User.token_version).where(
+        models.User.id == any_(bindparam("ids", list(user_ids), type_=ARRAY(Integer)))
+    )
+
+
+class TokenVersions:
+    """LRU de user_id -> versión vigente (DELETED si la cuenta ya no existe)"""
+
+    def __init__(self, refresh_seconds: float, max_size: int):
+        self.refresh_seconds = refresh_seconds
+        self.max_size = max_size
+        self._versions = OrderedDict()
+        self._refreshed_at = time.time()
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._loads = 0
+        self._refreshes = 0
+        self._rejected = 0
+
+    def pending(self, user_id: int):
+        """
+        Ids a leer de la base de datos antes de validar un token de `user_id`:
+        todos los conocidos si toca refrescar, solo `user_id` si es nuevo, o ninguno.
+        """
+        with self._lock:
+            now = time.time()
+            if now - self._refreshed_at >= self.refresh_seconds and self._versions:
+                # Se marca al empezar: las peticiones concurrentes no repiten el refresco
+                self._refreshed_at = now
+                self._refreshes += 1
+                return set(self._versions) | {user_id}
+            if user_id not in self._versions:
+                self._loads += 1
+                return {user_id}
+            return set()
+
+    def load(self, user_ids, rows):
+        """
+        Aplicar las versiones leídas; los ids sin fila son cuentas eliminadas.
+        La lectura puede ser anterior a un set() concurrente (p. ej. un
+        change_password en esta instancia), así que nunca baja una versión ni
+        revive una cuenta eliminada (los ids no se reutilizan).
+        """
+        found = dict(rows)
+        with self._lock:
+            for user_id in user_ids:
+                version = found.get(user_id, DELETED)
+                if user_id in self._versions:
+                    current = self._versions[user_id]
+                    if current is DELETED or (version is not DELETED and version < current):
+                        version = current
+                self._store(user_id, version)
+
+    def set(self, user_id: int, version: Optional[int]):
+        """Versión nueva tras un cambio en esta instancia (DELETED al borrar la cuenta)"""
+        with self._lock:
+            self._store(user_id, version)
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        with self._lock:
+            self._checks += 1
+            current = self._versions.get(user_id, DELETED)
+            if user_id in self._versions:
+                self._versions.move_to_end(user_id)
+            if current is DELETED or current != version:
+                self._rejected += 1
+                return False
+            return True
+
+    def _store(self, user_id: int, version: Optional[int]):
+        # Llamar con el lock tomado
+        self._versions[user_id] = version
+        self._versions.move_to_end(user_id)
+        while len(self._versions) > self.max_size:
+            self._versions.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._versions),
+                "max_size": self.max_size,
+                "refresh_seconds": self.refresh_seconds,
+                "checks": self._checks,
+                "loads": self._loads,
+                "refreshes": self._refreshes,
+                "rejected": self._rejected,
+            }
+
+
+token_versions = TokenVersions(TOKEN_VERSION_REFRESH_SECONDS, TOKEN_VERSION_MAX_SIZE)